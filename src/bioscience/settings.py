@@ -60,11 +60,19 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ], 
+    # https://www.django-rest-framework.org/api-guide/settings/#default_renderer_classes
+    # JSON is encoded with orjson (renderers.py), the browsable API stays available
+    'DEFAULT_RENDERER_CLASSES': [
+        'bioscience_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTO_SCHEMA': {'URL':'http://13.51.72.170',
     },
 }
 
 MIDDLEWARE = [
+    'bioscience_app.middleware.MetricsMiddleware', # to count requests and their latency per route (/metrics)
+    'bioscience_app.middleware.PerformanceMiddleware', # to time requests (Server-Timing header and log lines)
     'bioscience_app.middleware.BadRequestMiddleware', # to intercept 400 error for create new protein
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,6 +83,37 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Server-Timing
+# PerformanceMiddleware: on by default while DEBUG, BIOSCIENCE_PERFORMANCE_TIMING=1/0 switches it on/off, requests
+# slower than SLOW_REQUEST_MS are logged as warnings together with their SQL
+PERFORMANCE_TIMING = os.environ.get('BIOSCIENCE_PERFORMANCE_TIMING', '1' if DEBUG else '0') == '1'
+SLOW_REQUEST_MS = int(os.environ.get('BIOSCIENCE_SLOW_REQUEST_MS', '500'))
+
+# https://prometheus.io/docs/instrumenting/exposition_formats/
+# MetricsMiddleware: request counters and latency histograms per route at /metrics, BIOSCIENCE_METRICS=0 switches it off.
+# With several worker processes (gunicorn -w 4) set BIOSCIENCE_METRICS_DIR to a directory shared by the workers,
+# every worker writes its totals there and /metrics adds them up. gunicorn.conf.py empties the directory when gunicorn
+# starts and keeps the totals of recycled workers, with another server empty the directory before starting it
+METRICS_ENABLED = os.environ.get('BIOSCIENCE_METRICS', '1') == '1'
+METRICS_DIR = os.environ.get('BIOSCIENCE_METRICS_DIR') or None
+
+# https://docs.djangoproject.com/en/4.2/topics/logging/#configuring-logging
+# one line per request is logged at INFO level (BIOSCIENCE_PERFORMANCE_LOG_LEVEL=INFO shows them), slow requests at WARNING
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'bioscience_app.performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('BIOSCIENCE_PERFORMANCE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'bioscience.urls'
 
 TEMPLATES = [
@@ -103,13 +142,33 @@ import os
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# BIOSCIENCE_DB_NAME allows to use another database file (scripts/benchmark_load.py uses a scratch database)
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.environ.get('BIOSCIENCE_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
     }
 }
 
+# https://docs.djangoproject.com/en/4.2/topics/cache/#local-memory-caching
+# "responses" keeps serialized protein and pfam detail responses (caching.py), local memory caches drop the least
+# recently used entries when MAX_ENTRIES is reached (CULL_FREQUENCY 10 drops a tenth), keys contain the data version so
+# entries never need a timeout
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bioscience-responses',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('BIOSCIENCE_RESPONSE_CACHE_ENTRIES', '10000')),
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -54,7 +54,9 @@ urlpatterns = [
     path('api/pfam/<str:domain_id>/', views_api.RetrievePfamDetailsView.as_view(), name='pfam-domain-detail'),
     path('api/proteins/<int:taxa_id>/', views_api.ListProteinByTaxaView.as_view(), name='protein_by_taxa'),
     path('api/pfams/<int:taxa_id>/', views_api.ListDomainByTaxaView.as_view(), name='domain_by_taxa'),
+    path('api/coverage/', views_api.BatchCoverageView.as_view(), name='coverage-batch'),
     path('api/coverage/<str:protein_id>/', views_api.CoverageView.as_view(), name='coverage'),
+    path('metrics', views.metrics, name='metrics'),
     path('admin/', admin.site.urls),
     path('', include('bioscience_app.urls')),
     path('protein/create_new_protein/', new_protein_form_page, name='new_protein_form_page'),
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BioscienceAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "bioscience_app"
+
+    # https://docs.djangoproject.com/en/4.2/topics/signals/#connecting-receiver-functions
+    def ready(self):
+        from . import signals # connects the receivers which keep stored coverage up to date
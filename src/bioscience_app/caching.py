@@ -0,0 +1,131 @@
+import math
+import hashlib
+import time
+import random
+import threading
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F, Subquery
+from django.utils import timezone
+from .models import DataVersion
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# https://docs.djangoproject.com/en/4.2/topics/cache/#cache-versioning
+# https://docs.djangoproject.com/en/4.2/topics/cache/#local-memory-caching
+# Cached API responses are stored under a key which contains the data version. Every change of the data (a load, a
+# protein created/updated/deleted through the API or the admin site) increases the version, so all cached responses
+# become unreachable at once without deleting any key, the bounded LRU cache drops them as new responses come in.
+# The same version (with the last_modified stamp of the requested row) gives the ETag of API responses.
+
+DATA_VERSION = 'data' # name of the DataVersion row counting changes of proteins, domains and pfams
+RESPONSE_CACHE = 'responses' # cache alias of the serialized responses (settings.CACHES)
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#values-list
+# current data version (0 before the first change), one primary key lookup
+def data_version():
+    return DataVersion.objects.filter(name=DATA_VERSION).values_list('version', flat=True).first() or 0
+
+# current data version and the time it was increased ((0, None) before the first change)
+def data_version_state():
+    return DataVersion.objects.filter(name=DATA_VERSION).values_list('version', 'changed_at').first() or (0, None)
+
+# https://docs.djangoproject.com/en/4.2/ref/models/expressions/#subquery-expressions
+# (last_modified, data version, time of the data version) of one row of model read with a single query,
+# None if the row does not exist
+def object_version_state(model, **lookup):
+    versions = DataVersion.objects.filter(name=DATA_VERSION)
+    row = model.objects.filter(**lookup).annotate(
+        data_version=Subquery(versions.values('version')[:1]),
+        data_changed_at=Subquery(versions.values('changed_at')[:1]),
+    ).values_list('last_modified', 'data_version', 'data_changed_at').first()
+    if row is None:
+        return None
+    last_modified, version, changed_at = row
+    return last_modified, version or 0, changed_at
+
+# https://docs.djangoproject.com/en/4.2/ref/models/expressions/#f-expressions
+# increases the data version by one in the database (F() so concurrent bumps from several processes are not lost),
+# called inside the transaction which changes the data
+def bump_data_version():
+    with transaction.atomic():
+        now = timezone.now()
+        if not DataVersion.objects.filter(name=DATA_VERSION).update(version=F('version') + 1, changed_at=now):
+            _, created = DataVersion.objects.get_or_create(name=DATA_VERSION, defaults={'version': 1, 'changed_at': now})
+            if not created: # another process created the row first
+                DataVersion.objects.filter(name=DATA_VERSION).update(version=F('version') + 1, changed_at=now)
+
+# cache of serialized responses
+def response_cache():
+    return caches[RESPONSE_CACHE]
+
+# https://docs.djangoproject.com/en/4.2/topics/cache/#cache-key-warnings
+# key of a cached response: view, data version, response format and the looked up value (a protein_id from the URL or
+# a full URL), which is hashed so keys have no spaces or control characters and stay short enough for memcached
+def response_cache_key(prefix, version, response_format, lookup):
+    return f"{prefix}:{version}:{response_format}:{hashlib.sha1(str(lookup).encode()).hexdigest()}"
+
+
+# https://cseweb.ucsd.edu/~avattani/papers/cache_stampede.pdf
+# https://docs.djangoproject.com/en/4.2/topics/cache/#cache-add
+# computations of this process in progress (key -> Event set when the computation is stored)
+_flights = {}
+_flights_lock = threading.Lock()
+LOCK_TIMEOUT = 30 # seconds a computation may hold its lock (waiters give up and compute themselves after it)
+
+# returns the value of compute() cached under key for timeout seconds, protected against cache stampedes:
+# - single flight: when the value is missing only one thread (and with a shared cache backend one process, through a
+#   cache.add lock) computes it, the others wait for its result instead of running the same queries at once
+# - early refresh (XFetch): every read decides at random whether to recompute before expiry, the closer to expiry and
+#   the longer the computation took the likelier (beta > 1 refreshes earlier), so popular keys are refreshed by one
+#   request while all others still get the cached value and never see a miss
+def cached_computation(key, compute, timeout, beta=1.0, cache=None):
+    cache = cache or response_cache()
+    entry = cache.get(key) # (value, seconds the computation took, expiry as unix time)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if time.time() - delta * beta * math.log(1.0 - random.random()) < expires_at:
+            return value
+
+    with _flights_lock:
+        event = _flights.get(key)
+        leader = event is None
+        if leader:
+            event = _flights[key] = threading.Event()
+    if not leader: # another thread of this process computes the value
+        if entry is not None:
+            return entry[0] # early refresh in progress, the cached value is still valid
+        event.wait(LOCK_TIMEOUT)
+        entry = cache.get(key)
+        return entry[0] if entry is not None else compute()
+
+    try:
+        lock_key = f"lock:{key}"
+        locked = cache.add(lock_key, True, LOCK_TIMEOUT)
+        if not locked: # another process computes the value (shared cache backends)
+            if entry is not None:
+                return entry[0]
+            waited = 0.0
+            while waited < LOCK_TIMEOUT and cache.get(lock_key) is not None:
+                time.sleep(0.05)
+                waited += 0.05
+                entry = cache.get(key)
+                if entry is not None:
+                    return entry[0]
+        try:
+            started = time.perf_counter()
+            value = compute()
+            cache.set(key, (value, time.perf_counter() - started, time.time() + timeout), timeout)
+            return value
+        finally:
+            if locked:
+                cache.delete(lock_key)
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        event.set()
+
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
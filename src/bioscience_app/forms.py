@@ -13,6 +13,9 @@ from django.forms.models import inlineformset_factory
 # https://docs.djangoproject.com/en/3.2/ref/models/instances/#django.db.models.Model.save
 # https://docs.djangoproject.com/en/3.2/ref/models/querysets/
 # https://www.djangoproject.com/community/q-and-a/?page=339
+# https://docs.djangoproject.com/en/4.2/ref/forms/api/#django.forms.Form.has_error
+
+DUPLICATE_PROTEIN = 'duplicate_protein' # error code of an already existing protein_id
 
 # organism form using Django's model
 class FormForOrganism(forms.ModelForm):
@@ -30,7 +33,7 @@ class NewProteinForm(forms.ModelForm):
     def clean_protein_id(self):
         protein_id = self.cleaned_data.get('protein_id')
         if Protein.objects.filter(protein_id=protein_id).exists():
-            raise forms.ValidationError('Protein with this ID already exists.')
+            raise forms.ValidationError('Protein with this ID already exists.', code=DUPLICATE_PROTEIN)
         return protein_id
 
 # pfam form using Django's model
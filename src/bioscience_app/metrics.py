@@ -0,0 +1,274 @@
+import os
+import atexit
+import json
+import time
+import glob
+import bisect
+import threading
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# https://prometheus.io/docs/concepts/metric_types/
+# https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+# https://prometheus.io/docs/practices/histograms/
+
+# upper bounds (seconds) of the request duration buckets, p50/p95/p99 are read from them with histogram_quantile()
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# help text of the metrics written by MetricsMiddleware
+METRIC_HELP = {
+    'bioscience_requests_total': "Requests handled, by route, method and status code.",
+    'bioscience_request_duration_seconds': "Time until the response was returned to the WSGI server, by route and method.",
+}
+
+# https://docs.python.org/3/library/threading.html#thread-local-data
+# In-process counters and fixed-bucket histograms. Every thread writes to its own shard (a plain dict), so recording a
+# request never takes a lock and never contends with other threads, the shards are only added up when the metrics are
+# read. Shards of finished threads (runserver starts a thread per request) are added to the retired totals and
+# dropped whenever a shard is created or the metrics are read, so only the shards of live threads are kept.
+# With a directory every process also writes its totals to metrics_<pid>.json there (at most every
+# dump_interval seconds) and collect() adds up the files of all worker processes (see retire_process_file).
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS, directory=None, dump_interval=1.0):
+        self.buckets = tuple(buckets)
+        self.directory = directory
+        self.dump_interval = dump_interval
+        self._local = threading.local()
+        self._shards = [] # (thread, shard) of the live threads which recorded something
+        self._retired = new_totals() # totals of the shards of finished threads
+        self._shards_lock = threading.Lock() # only taken when a thread creates its shard and when metrics are read
+        self._dump_lock = threading.Lock()
+        self._last_dump = None # monotonic time of the last dump
+
+    # shard of the calling thread, created on first use
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = new_totals()
+            with self._shards_lock:
+                self._retire_finished()
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+        return shard
+
+    # https://docs.python.org/3/library/threading.html#threading.Thread.is_alive
+    # adds the shards of finished threads (nothing writes to them any more) to the retired totals and drops them,
+    # called with _shards_lock held
+    def _retire_finished(self):
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                add_totals(self._retired, shard)
+        self._shards = live
+
+    # labels as a sorted tuple so the same labels always give the same key
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted((labels or {}).items())))
+
+    # adds value to a counter
+    def inc(self, name, labels=None, value=1):
+        counters = self._shard()['counters']
+        key = self._key(name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    # https://docs.python.org/3/library/bisect.html#bisect.bisect_left
+    # records one observation in a histogram, stored per bucket (not cumulative) followed by the sum of observations
+    def observe(self, name, value, labels=None):
+        histograms = self._shard()['histograms']
+        key = self._key(name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * (len(self.buckets) + 2) # buckets, +Inf, sum
+        histogram[bisect.bisect_left(self.buckets, value)] += 1
+        histogram[-1] += value
+
+    # totals of all threads of this process, shards are copied first (dict.copy runs without releasing the GIL)
+    # because their threads keep writing while they are read
+    def snapshot(self):
+        totals = new_totals()
+        with self._shards_lock:
+            self._retire_finished()
+            add_totals(totals, self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            add_totals(totals, {'counters': shard['counters'].copy(), 'histograms': shard['histograms'].copy()})
+        return totals
+
+    # forgets everything recorded in this process (used by tests)
+    def reset(self):
+        with self._shards_lock:
+            self._retired = new_totals()
+            for _, shard in self._shards:
+                shard['counters'].clear()
+                shard['histograms'].clear()
+
+    # file with the totals of process pid
+    def _path(self, pid):
+        return process_file(self.directory, pid)
+
+    # https://docs.python.org/3/library/os.html#os.replace
+    # writes the totals of this process to its file (replaced atomically so readers never see half a file),
+    # unless force is set only if dump_interval has passed and no other thread is writing it
+    def dump(self, force=False):
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and self._last_dump is not None and now - self._last_dump < self.dump_interval:
+            return
+        if not self._dump_lock.acquire(blocking=force):
+            return
+        try:
+            self._last_dump = now
+            write_totals(self._path(os.getpid()), self.buckets, self.snapshot())
+        finally:
+            self._dump_lock.release()
+
+    # https://docs.python.org/3/library/glob.html
+    # totals of this process (live), of every other live process which wrote a file to the directory and of the
+    # workers which exited (metrics_retired.json, see retire_process_file)
+    def collect(self):
+        snapshot = self.snapshot()
+        if not self.directory:
+            return snapshot
+        own_file = self._path(os.getpid())
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            if path == own_file:
+                continue
+            totals = read_totals(path, self.buckets)
+            if totals is not None:
+                add_totals(snapshot, totals)
+        return snapshot
+
+    # https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+    # collected metrics in the Prometheus text format, histogram buckets are cumulative as the format requires
+    def render(self):
+        snapshot = self.collect()
+        lines = []
+        for name, series in group_by_name(snapshot['counters']):
+            lines += metric_header(name, 'counter')
+            for labels, value in series:
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        for name, series in group_by_name(snapshot['histograms']):
+            lines += metric_header(name, 'histogram')
+            for labels, values in series:
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', format_value(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {format_value(values[-1])}")
+                lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+# empty counters and histograms
+def new_totals():
+    return {'counters': {}, 'histograms': {}}
+
+# adds counters and histograms of other to totals
+def add_totals(totals, other):
+    counters, histograms = totals['counters'], totals['histograms']
+    for key, value in other['counters'].items():
+        counters[key] = counters.get(key, 0) + value
+    for key, values in other['histograms'].items():
+        histograms[key] = [total + value for total, value in zip(histograms.get(key, [0] * len(values)), values)]
+
+# file with the totals of process pid in directory
+def process_file(directory, pid):
+    return os.path.join(directory, f"metrics_{pid}.json")
+
+# file with the totals of the worker processes which exited
+def retired_file(directory):
+    return os.path.join(directory, "metrics_retired.json")
+
+# https://docs.python.org/3/library/os.html#os.replace
+# writes totals to path (replaced atomically so readers never see half a file)
+def write_totals(path, buckets, totals):
+    data = {
+        'buckets': buckets,
+        'counters': [[name, labels, value] for (name, labels), value in totals['counters'].items()],
+        'histograms': [[name, labels, values] for (name, labels), values in totals['histograms'].items()],
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+# totals written to path, None if the file is missing, can not be read or was written with other buckets
+def read_totals(path, buckets):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError: # the worker exited and its file was retired meanwhile
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Metrics file '{path}' could not be read: {e}")
+        return None
+    if tuple(data['buckets']) != tuple(buckets): # written with other buckets, can not be added up
+        return None
+    return {
+        'counters': {(name, tuple(tuple(label) for label in labels)): value for name, labels, value in data['counters']},
+        'histograms': {(name, tuple(tuple(label) for label in labels)): values for name, labels, values in data['histograms']},
+    }
+
+# https://docs.gunicorn.org/en/stable/settings.html#child-exit
+# adds the file of an exited worker process to metrics_retired.json and removes it, so totals do not go back when a
+# worker is recycled and a new worker with the same pid starts from zero. Called by the master process (gunicorn.conf.py)
+def retire_process_file(directory, pid, buckets=DEFAULT_BUCKETS):
+    path = process_file(directory, pid)
+    totals = read_totals(path, buckets)
+    if totals is not None:
+        retired = read_totals(retired_file(directory), buckets) or new_totals()
+        add_totals(retired, totals)
+        write_totals(retired_file(directory), buckets, retired)
+    if os.path.exists(path):
+        os.remove(path)
+
+# https://docs.gunicorn.org/en/stable/settings.html#on-starting
+# removes the files of an earlier run of the server, called once before the workers start so totals start from zero
+def clear_directory(directory):
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json*')):
+        os.remove(path)
+
+# series of every metric name, sorted so the output is stable
+def group_by_name(values):
+    names = {}
+    for (name, labels), value in sorted(values.items()):
+        names.setdefault(name, []).append((labels, value))
+    return names.items()
+
+# HELP and TYPE lines of a metric
+def metric_header(name, kind):
+    header = [f"# TYPE {name} {kind}"]
+    if name in METRIC_HELP:
+        header.insert(0, f"# HELP {name} {METRIC_HELP[name]}")
+    return header
+
+# {name="value",...} with backslash, quote and newline escaped as the text format requires
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+# numbers as Prometheus writes them (+Inf, integers without .0)
+def format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+# registry of this process, written by MetricsMiddleware and read by the /metrics view
+registry = MetricsRegistry()
+
+# https://docs.python.org/3/library/atexit.html
+# the requests since the last dump are written when the process exits (nothing is written without a directory)
+atexit.register(registry.dump, force=True)
+
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
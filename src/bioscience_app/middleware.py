@@ -1,17 +1,140 @@
+import json
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from . import metrics
+
 # START: I wrote the code based on documentation and references. Important links were included in the comments next to each function. 
 # Please review links below and short commentary in readme.txt. Thank you.
 
+logger = logging.getLogger('bioscience_app.performance')
+
+# timings of the request handled by this thread/task (None outside PerformanceMiddleware)
+request_timings = ContextVar('request_timings', default=None)
+
 # https://docs.djangoproject.com/en/4.2/topics/http/middleware/
+# turns a response into 400 when the view marked it with duplicate_protein = True (new protein form with a protein_id
+# which already exists), the body is never read so streamed and large responses pass through unchanged
 class BadRequestMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         response = self.get_response(request)
-        if 'Protein with this ID already exists' in str(response.content): 
+        if getattr(response, 'duplicate_protein', False):
             response.status_code = 400
         return response
 
 
+# https://docs.djangoproject.com/en/4.2/topics/db/instrumentation/
+# collects number, time and SQL of the queries of one request (used as execute_wrapper) and serializer time
+class RequestTimings:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.sql = [] # (seconds, sql) of every query
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += duration
+            self.sql.append((duration, sql))
+
+# https://docs.python.org/3/library/contextlib.html#contextlib.contextmanager
+# adds time spent in the with block to serializer time of the current request
+@contextmanager
+def timed_serializer():
+    timings = request_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.serializer_time += time.perf_counter() - started
+
+# https://docs.djangoproject.com/en/4.2/topics/http/middleware/#marking-middleware-as-unused
+# https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Server-Timing
+# records wall time, number of queries, DB time and serializer time of every request, sends them in the Server-Timing
+# header and logs them as one JSON line (requests slower than SLOW_REQUEST_MS are logged as warnings with their SQL).
+# With PERFORMANCE_TIMING off the middleware removes itself from the chain and costs nothing.
+class PerformanceMiddleware:
+    MAX_LOGGED_QUERIES = 100 # SQL statements logged for a slow request (slowest first)
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFORMANCE_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_request_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        response['Server-Timing'] = ", ".join([
+            f'db;dur={timings.db_time * 1000:.1f};desc="{timings.queries} queries"',
+            f'serializer;dur={timings.serializer_time * 1000:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'db_ms': round(timings.db_time * 1000, 1),
+            'queries': timings.queries,
+            'serializer_ms': round(timings.serializer_time * 1000, 1),
+        }
+        if total_ms >= self.slow_request_ms:
+            slowest = sorted(timings.sql, key=lambda query: query[0], reverse=True)[:self.MAX_LOGGED_QUERIES]
+            record['sql'] = [{'ms': round(duration * 1000, 2), 'sql': sql} for duration, sql in slowest]
+            logger.warning("slow request %s", json.dumps(record))
+        else:
+            logger.info("request %s", json.dumps(record))
+        return response
+
+
+# https://docs.djangoproject.com/en/4.2/ref/urlresolvers/#django.urls.ResolverMatch
+# https://prometheus.io/docs/practices/naming/#labels
+# counts requests and records their duration per route in metrics.registry (read at /metrics). The route is the URL
+# name from bioscience/urls.py (protein-detail, protein_by_taxa, ...) rather than the path, so the number of series
+# stays small; requests which match no URL are counted as "unmatched". Streamed responses are timed until the
+# response is returned, not until the last chunk is sent.
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        metrics.registry.directory = getattr(settings, 'METRICS_DIR', None)
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        route = (match.url_name or match.route) if match else 'unmatched'
+        metrics.registry.inc('bioscience_requests_total', {'route': route, 'method': request.method, 'status': str(response.status_code)})
+        metrics.registry.observe('bioscience_request_duration_seconds', duration, {'route': route, 'method': request.method})
+        metrics.registry.dump()
+        return response
+
+
 # END: I wrote the code based on documentation and references. Important links were included in the comments next to each function. 
-# Please review links below and short commentary in readme.txt. Thank you.
\ No newline at end of file
+# Please review links below and short commentary in readme.txt. Thank you.
@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+# copies organism.taxa_id to the new taxa_id columns of existing proteins and domain assignments
+def copy_taxa_ids(apps, schema_editor):
+    Protein = apps.get_model('bioscience_app', 'Protein')
+    DomainAssignment = apps.get_model('bioscience_app', 'DomainAssignment')
+    Protein.objects.update(taxa_id=models.Subquery(
+        Protein.objects.filter(pk=models.OuterRef('pk')).values('organism__taxa_id')[:1]
+    ))
+    DomainAssignment.objects.update(taxa_id=models.Subquery(
+        Protein.objects.filter(pk=models.OuterRef('protein_id')).values('taxa_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bioscience_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='domainassignment',
+            name='taxa_id',
+            field=models.IntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='protein',
+            name='taxa_id',
+            field=models.IntegerField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='organism',
+            name='taxa_id',
+            field=models.IntegerField(db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='domainassignment',
+            index=models.Index(fields=['taxa_id', 'domain'], name='domain_assignment_taxa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='protein',
+            index=models.Index(fields=['taxa_id', 'protein_id'], name='protein_taxa_idx'),
+        ),
+        migrations.RunPython(copy_taxa_ids, migrations.RunPython.noop),
+    ]
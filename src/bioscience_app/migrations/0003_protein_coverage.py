@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 11:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bioscience_app', '0002_taxa_id_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProteinCoverage',
+            fields=[
+                ('protein', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='coverage', serialize=False, to='bioscience_app.protein')),
+                ('domain_count', models.IntegerField(default=0)),
+                ('raw_length', models.IntegerField(default=0)),
+                ('covered_length', models.IntegerField(default=0)),
+                ('coverage', models.FloatField(null=True)),
+                ('raw_coverage', models.FloatField(null=True)),
+            ],
+        ),
+    ]
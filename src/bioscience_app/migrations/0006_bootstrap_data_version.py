@@ -0,0 +1,21 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+# https://docs.djangoproject.com/en/4.2/topics/migrations/#data-migrations
+# creates the data version row at version 1, so responses are cached from the first request of a new database and
+# nothing has to bump the version only to start versioning (existing rows are kept)
+def create_data_version(apps, schema_editor):
+    DataVersion = apps.get_model('bioscience_app', 'DataVersion')
+    DataVersion.objects.get_or_create(name='data', defaults={'version': 1, 'changed_at': timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bioscience_app', '0005_last_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_data_version, migrations.RunPython.noop),
+    ]
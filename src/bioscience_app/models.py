@@ -7,11 +7,14 @@ from django.db import models
 # https://docs.djangoproject.com/en/3.2/ref/models/options/
 # https://docs.djangoproject.com/en/3.2/topics/db/models/#relationships
 # https://docs.djangoproject.com/en/3.2/ref/models/instances/#str
+# https://docs.djangoproject.com/en/4.2/ref/models/indexes/
+# https://docs.djangoproject.com/en/4.2/ref/models/instances/#customizing-model-loading
+# https://docs.djangoproject.com/en/4.2/ref/models/instances/#django.db.models.Model.save
 
 # create Organism model which uses Django Model 
 class Organism(models.Model):
-    # create field taxa_id with optional null value
-    taxa_id = models.IntegerField(null=True)
+    # create field taxa_id with optional null value (indexed, the API looks organisms up by taxa_id)
+    taxa_id = models.IntegerField(null=True, db_index=True)
     # create field clade with max length of 100 char
     clade = models.CharField(max_length=100)
      # create field genus with max length of 100 char (genus species name is split during data loading)
@@ -24,6 +27,21 @@ class Organism(models.Model):
         # returns formatted string 
         return f"{self.taxa_id}, {self.clade}, {self.genus}, {self.species}"
 
+    # remember taxa_id loaded from DB so save() knows when it changed
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_taxa_id = instance.__dict__.get('taxa_id')
+        return instance
+
+    # a changed taxa_id is copied to the proteins and domain assignments of the organism
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if hasattr(self, '_loaded_taxa_id') and self._loaded_taxa_id != self.taxa_id:
+            Protein.objects.filter(organism=self).update(taxa_id=self.taxa_id)
+            DomainAssignment.objects.filter(protein__organism=self).update(taxa_id=self.taxa_id)
+        self._loaded_taxa_id = self.taxa_id
+
     # create unique combination 
     class Meta:
         unique_together = ('taxa_id', 'clade', 'genus', 'species')
@@ -43,12 +61,36 @@ class Protein(models.Model):
     organism = models.ForeignKey(Organism, on_delete=models.CASCADE, related_name='proteins')
     # create field id_custom which allows null and blank values
     id_custom = models.IntegerField(null=True, blank=True)
+    # copy of organism.taxa_id so proteins of a taxa are found without a join, set by save() (and by the loaders)
+    taxa_id = models.IntegerField(null=True, editable=False)
+    # time of the last change, set by save() and by the loaders (part of the ETag of the protein API)
+    last_modified = models.DateTimeField(auto_now=True)
 
     # create method that returns a string 
     def __str__(self):
             # returns formatted string 
             return f"{self.protein_id} (Organism: {self.organism.genus} {self.organism.species})"
 
+    # remember taxa_id loaded from DB so save() knows when it changed
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_taxa_id = instance.__dict__.get('taxa_id')
+        return instance
+
+    # copy taxa_id of the organism, a changed taxa_id is copied to the domain assignments of the protein
+    def save(self, *args, **kwargs):
+        if self.organism_id is not None: # without organism the database rejects the protein
+            self.taxa_id = self.organism.taxa_id
+        super().save(*args, **kwargs)
+        if hasattr(self, '_loaded_taxa_id') and self._loaded_taxa_id != self.taxa_id:
+            DomainAssignment.objects.filter(protein=self).update(taxa_id=self.taxa_id)
+        self._loaded_taxa_id = self.taxa_id
+
+    # index for the proteins of a taxa in protein_id order
+    class Meta:
+        indexes = [models.Index(fields=['taxa_id', 'protein_id'], name='protein_taxa_idx')]
+
 
 # create Pfam model which uses Django Model 
 class Pfam(models.Model):
@@ -56,6 +98,8 @@ class Pfam(models.Model):
     domain_id = models.CharField(max_length=50, primary_key=True)
     # create field domain_description with max length 200 char
     domain_description = models.CharField(max_length=200)
+    # time of the last change, set by save() and by the loaders (part of the ETag of the pfam API)
+    last_modified = models.DateTimeField(auto_now=True)
 
     # create method that returns a string 
     def __str__(self):
@@ -87,10 +131,19 @@ class DomainAssignment(models.Model):
     start = models.IntegerField()
     # create field end 
     end = models.IntegerField()
+    # copy of protein.taxa_id so domains of a taxa are found without joins, set by save() (and by the loaders)
+    taxa_id = models.IntegerField(null=True, editable=False)
 
-    # create unique combination 
+    # create unique combination, index for the domains of a taxa
     class Meta:
         unique_together = ('protein', 'domain', 'start', 'end')
+        indexes = [models.Index(fields=['taxa_id', 'domain'], name='domain_assignment_taxa_idx')]
+
+    # copy taxa_id of the protein
+    def save(self, *args, **kwargs):
+        if self.protein_id is not None: # without protein the database rejects the assignment
+            self.taxa_id = self.protein.taxa_id
+        super().save(*args, **kwargs)
 
      # create method that returns a string 
     def __str__(self):
@@ -98,5 +151,33 @@ class DomainAssignment(models.Model):
         return f"{self.protein.protein_id} ({self.protein.organism.genus} {self.protein.organism.species}) - {self.domain.domain_description} - {self.start}-{self.end}"
 
 
+# create Protein Coverage model which stores coverage of every protein (see coverage.py), it is refreshed when domain
+# assignments or proteins are saved (signals.py) and by the loaders, "python manage.py rebuild_coverage" rebuilds it
+class ProteinCoverage(models.Model):
+    # one row per protein, deleted together with the protein
+    protein = models.OneToOneField(Protein, on_delete=models.CASCADE, primary_key=True, related_name='coverage')
+    # create field domain_count (number of domain assignments)
+    domain_count = models.IntegerField(default=0)
+    # create field raw_length (sum of domain lengths, overlaps are counted twice)
+    raw_length = models.IntegerField(default=0)
+    # create field covered_length (residues covered by at least one domain)
+    covered_length = models.IntegerField(default=0)
+    # create field coverage (covered_length / protein length), null for proteins without length
+    coverage = models.FloatField(null=True)
+    # create field raw_coverage (raw_length / protein length), null for proteins without length
+    raw_coverage = models.FloatField(null=True)
+
+
+# create Data Version model which counts changes of the data (one row per name, "data" is bumped by the loaders and by
+# the protein API), cached API responses are stored under the current version (see caching.py)
+class DataVersion(models.Model):
+    # name of the counter
+    name = models.CharField(max_length=50, primary_key=True)
+    # create field version (increased by every change)
+    version = models.PositiveBigIntegerField(default=0)
+    # create field changed_at (time of the last increase, Last-Modified of API responses)
+    changed_at = models.DateTimeField(null=True)
+
+
 # END: I wrote the code based on documentation and references. Important links were included in the comments next to each function. 
 # Please review links below and short commentary in readme.txt. Thank you.
@@ -1,6 +1,8 @@
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
+from django.db import transaction
 from .models import Protein, Organism, Domain, Pfam, DomainAssignment
+from .caching import bump_data_version
 
 # START: I wrote the code based on documentation and references. Important links were included in the comments next to each function. 
 # Please review links below and short commentary in readme.txt. Thank you.
@@ -84,7 +86,9 @@ class SerializerForProtein(serializers.ModelSerializer):
         model = Protein # model used
         fields = ['protein_id', 'sequence', 'taxonomy', 'length', 'domains'] # fields used
 
-    # override method 
+    # https://docs.djangoproject.com/en/4.2/topics/db/transactions/#django.db.transaction.atomic
+    # new protein is saved together with a new data version (cached API responses are invalidated)
+    @transaction.atomic
     def create(self, validated_data):
         # "pop" data from validated data
         domain_assignments_data = validated_data.pop('domain_assignments')
@@ -102,10 +106,12 @@ class SerializerForProtein(serializers.ModelSerializer):
             pfam, _ = Pfam.objects.get_or_create(**pfam_data)
             domain, _ = Domain.objects.get_or_create(pfam=pfam, **domain_data)
             DomainAssignment.objects.create(protein=protein, domain=domain, **domain_assignment_data)
+        bump_data_version()
    
         return protein
 
-     # override method  
+     # override method, changes are saved together with a new data version
+    @transaction.atomic
     def update(self, instance, validated_data):
         # "pop" data from validated data
         domain_assignments_data = validated_data.pop('domain_assignments')
@@ -131,6 +137,7 @@ class SerializerForProtein(serializers.ModelSerializer):
                 for attr, value in domain_assignment_data.items():
                     setattr(domain_assignment, attr, value)
                 domain_assignment.save()
+        bump_data_version()
 
         return instance
 
@@ -0,0 +1,334 @@
+import os
+import time
+import tempfile
+import threading
+import warnings
+from io import StringIO
+from unittest import mock
+from django.test import TestCase, LiveServerTestCase
+from django.core.management import call_command
+from django.core.cache.backends.base import CacheKeyWarning, memcache_key_warnings
+from django.urls import reverse
+from django.contrib.admin.models import LogEntry, CHANGE
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from rest_framework.test import APITestCase
+from bioscience_app.models import Organism, Protein, Pfam, DataVersion
+from bioscience_app.caching import data_version, bump_data_version, response_cache, response_cache_key, cached_computation
+from bioscience_app.tests.base import ResponseCacheMixin, ResponseCacheTestCase, ResponseCacheAPITestCase
+from bioscience_app.management.commands.warm_cache import read_access_log, read_popularity_table, paths_to_warm
+from scripts import load_data
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# https://docs.djangoproject.com/en/4.2/topics/cache/#cache-versioning
+
+class DataVersionTest(TestCase):
+    # test version starts at 1 (created by migration 0006) and every bump adds one
+    def test_bump(self):
+        self.assertEqual(data_version(), 1)
+        bump_data_version()
+        bump_data_version()
+        self.assertEqual(data_version(), 3)
+
+    # test bump creates the version row when it is missing
+    def test_bump_without_row(self):
+        DataVersion.objects.all().delete()
+        self.assertEqual(data_version(), 0)
+        bump_data_version()
+        self.assertEqual(data_version(), 1)
+
+    # test a load bumps the version (also when the file is missing, earlier batches may be committed)
+    def test_loader_bumps_version(self):
+        load_data.load_data_pfam_descriptions(os.path.join(tempfile.mkdtemp(), 'missing.csv'), progress=False)
+        self.assertEqual(data_version(), 2)
+
+    # test changes made in the admin site bump the version
+    def test_admin_change_bumps_version(self):
+        user = User.objects.create_superuser('admin865', 'admin865@example.com', 'password')
+        organism = Organism.objects.create(taxa_id=1, clade='E', genus='Genus865', species='Species865')
+        LogEntry.objects.log_action(user.pk, ContentType.objects.get_for_model(Organism).pk, organism.pk, str(organism), CHANGE)
+        self.assertEqual(data_version(), 2)
+
+
+class VersionedResponseCacheTest(ResponseCacheAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # create objects
+        self.organism = Organism.objects.create(taxa_id=1, clade='E', genus='Genus865', species='Species865')
+        Protein.objects.create(protein_id='protein865', sequence='MKV', length=3, organism=self.organism)
+        Pfam.objects.create(domain_id='PF00865', domain_description='domain 865')
+        self.url = reverse('protein-detail', args=['protein865'])
+
+    # test second request is answered from the cache after the ETag validators query only
+    def test_cached_protein(self):
+        first = self.client.get(self.url, format='json')
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, format='json')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], 'application/json')
+
+    # test indented JSON is cached apart from compact JSON
+    def test_media_type_parameters(self):
+        compact = self.client.get(self.url, format='json')
+        indented = self.client.get(self.url, HTTP_ACCEPT='application/json; indent=4')
+        self.assertIn(b'\n    "protein_id"', indented.content)
+        self.assertEqual(self.client.get(self.url, format='json').content, compact.content)
+        self.assertNotIn(b'\n', compact.content)
+
+    # test pfam details are cached too
+    def test_cached_pfam(self):
+        url = reverse('pfam-domain-detail', args=['PF00865'])
+        self.client.get(url, format='json')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, format='json')
+        self.assertEqual(response.json(), {'domain_id': 'PF00865', 'domain_description': 'domain 865'})
+
+    # test changes which bypass the API are served once the version is bumped
+    def test_bump_invalidates(self):
+        self.client.get(self.url, format='json')
+        Protein.objects.filter(protein_id='protein865').update(sequence='MKVL', length=4)
+        self.assertEqual(self.client.get(self.url, format='json').json()['sequence'], 'MKV') # cached
+        bump_data_version()
+        self.assertEqual(self.client.get(self.url, format='json').json()['sequence'], 'MKVL')
+
+    # test update through the API invalidates cached responses
+    def test_update_invalidates(self):
+        self.client.get(self.url, format='json')
+        data = {
+            'protein_id': 'protein865',
+            'sequence': 'MKVLA',
+            'length': 5,
+            'taxonomy': {'taxa_id': 2, 'clade': 'E', 'genus': 'Genus866', 'species': 'Species866'},
+            'domains': [],
+        }
+        response = self.client.put(self.url, data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url, format='json').json()['taxonomy']['taxa_id'], 2)
+
+    # test deleted protein is not served from the cache
+    def test_delete_invalidates(self):
+        self.client.get(self.url, format='json')
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.assertEqual(self.client.get(self.url, format='json').status_code, 404)
+
+    # test missing proteins and the browsable API are not cached
+    def test_not_cached(self):
+        missing = reverse('protein-detail', args=['missing'])
+        self.client.get(missing, format='json')
+        self.client.get(self.url, HTTP_ACCEPT='text/html')
+        with self.assertNumQueries(2): # ETag validators and protein, the 404 was not cached
+            self.client.get(missing, format='json')
+        # keys are built the way the view builds them, the JSON response is found so the browsable API key is not
+        # missing by mistake
+        version = f"{data_version()}:{Protein.objects.get(protein_id='protein865').last_modified.timestamp()}"
+        self.assertIsNone(response_cache().get(response_cache_key('RetrieveProteinByIDView', version, 'api', ('text/html', 'protein865'))))
+        self.client.get(self.url, format='json')
+        self.assertIsNotNone(response_cache().get(response_cache_key('RetrieveProteinByIDView', version, 'json', ('application/json', 'protein865'))))
+
+    # test keys of detail and list responses are valid memcached keys (no spaces, at most 250 characters)
+    def test_keys_are_portable(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.client.get(self.url, format='json')
+        self.assertFalse([warning for warning in caught if issubclass(warning.category, CacheKeyWarning)])
+        key = response_cache_key('ListProteinByTaxaView', 1, 'data', 'http://testserver/api/proteins/865/?cursor=' + 'x' * 300)
+        self.assertEqual(list(memcache_key_warnings(response_cache().make_key(key))), [])
+
+# https://docs.djangoproject.com/en/4.2/topics/conditional-view-processing/
+class ConditionalGetTest(ResponseCacheAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # create objects
+        organism = Organism.objects.create(taxa_id=865, clade='E', genus='Genus865', species='Species865')
+        Protein.objects.create(protein_id='protein865', sequence='MKV', length=3, organism=organism)
+        Pfam.objects.create(domain_id='PF00865', domain_description='domain 865')
+        bump_data_version()
+        self.urls = [
+            reverse('protein-detail', args=['protein865']),
+            reverse('pfam-domain-detail', args=['PF00865']),
+            reverse('protein_by_taxa', args=[865]),
+            reverse('domain_by_taxa', args=[865]),
+            reverse('coverage', args=['protein865']),
+            reverse('protein-list'),
+        ]
+
+    # test every read endpoint answers If-None-Match with 304 after reading the validators only
+    def test_not_modified(self):
+        for url in self.urls:
+            response = self.client.get(url, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['ETag'].startswith('"'), url) # strong ETag
+            self.assertTrue(response.has_header('Last-Modified'))
+            with self.assertNumQueries(1):
+                not_modified = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(not_modified.status_code, 304, url)
+            self.assertEqual(not_modified.content, b'')
+
+    # test If-Modified-Since with the Last-Modified date is answered with 304
+    def test_if_modified_since(self):
+        response = self.client.get(self.urls[0], format='json')
+        not_modified = self.client.get(self.urls[0], format='json', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    # test indented JSON has its own ETag, a compact client's ETag does not match it
+    def test_etag_depends_on_media_type(self):
+        compact = self.client.get(self.urls[0], format='json')['ETag']
+        indented = self.client.get(self.urls[0], HTTP_ACCEPT='application/json; indent=4', HTTP_IF_NONE_MATCH=compact)
+        self.assertEqual(indented.status_code, 200)
+        self.assertNotEqual(indented['ETag'], compact)
+
+    # test ETag changes with the data version and with a change of the row
+    def test_etag_changes(self):
+        first = self.client.get(self.urls[0], format='json')['ETag']
+        bump_data_version()
+        second = self.client.get(self.urls[0], format='json')['ETag']
+        Protein.objects.get(protein_id='protein865').save() # new last_modified
+        third = self.client.get(self.urls[0], format='json')
+        self.assertEqual(len({first, second, third['ETag']}), 3)
+        self.assertEqual(self.client.get(self.urls[0], format='json', HTTP_IF_NONE_MATCH=first).status_code, 200)
+
+    # test pages, formats and streamed lists have their own ETags
+    def test_etag_per_representation(self):
+        url = self.urls[2]
+        etags = {
+            self.client.get(url, format='json')['ETag'],
+            self.client.get(url + '?page_size=1', format='json')['ETag'],
+            self.client.get(url, HTTP_ACCEPT='application/x-ndjson')['ETag'],
+        }
+        self.assertEqual(len(etags), 3)
+
+    # test missing rows get 404 without an ETag
+    def test_missing_row(self):
+        response = self.client.get(reverse('protein-detail', args=['missing']), format='json', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+# https://cseweb.ucsd.edu/~avattani/papers/cache_stampede.pdf
+class CachedComputationTest(ResponseCacheTestCase):
+    # test concurrent misses of the same key run the computation once and all get its value
+    def test_single_flight(self):
+        calls = []
+        started = threading.Event()
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2) # the other threads arrive while this one computes
+            return 'value'
+        results = []
+        def request():
+            results.append(cached_computation('key865', compute, 60))
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+
+    # test a value close to expiry (relative to how long it took to compute) is refreshed early, a fresh one is not
+    def test_early_refresh(self):
+        cache = response_cache()
+        with mock.patch('bioscience_app.caching.random.random', return_value=0.5): # -log(0.5) = 0.69
+            cache.set('fresh865', ('old', 1.0, time.time() + 1000), 60)
+            self.assertEqual(cached_computation('fresh865', lambda: 'new', 60), 'old')
+            cache.set('expiring865', ('old', 10.0, time.time() + 1), 60) # expires in 1 s, computation took 10 s
+            self.assertEqual(cached_computation('expiring865', lambda: 'new', 60), 'new')
+        self.assertEqual(cache.get('expiring865')[0], 'new')
+
+    # test the cached value is served while another thread refreshes it
+    def test_stale_while_refreshing(self):
+        cache = response_cache()
+        cache.set('refresh865', ('old', 10.0, time.time() + 1), 60)
+        release = threading.Event()
+        def slow():
+            release.wait()
+            return 'new'
+        with mock.patch('bioscience_app.caching.random.random', return_value=0.5):
+            leader = threading.Thread(target=cached_computation, args=('refresh865', slow, 60))
+            leader.start()
+            time.sleep(0.1)
+            self.assertEqual(cached_computation('refresh865', lambda: 'other', 60), 'old')
+            release.set()
+            leader.join()
+        self.assertEqual(cache.get('refresh865')[0], 'new')
+
+
+class CachedListTest(ResponseCacheAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # create objects
+        organism = Organism.objects.create(taxa_id=865, clade='E', genus='Genus865', species='Species865')
+        for number in range(3):
+            Protein.objects.create(protein_id=f"protein{number}", sequence='MKV', length=3, organism=organism)
+        self.url = reverse('protein_by_taxa', args=[865])
+
+    # test pages are cached once the data has a version and recomputed after the next change
+    def test_cached_page(self):
+        first = self.client.get(self.url, format='json').json()
+        with self.assertNumQueries(1): # data version only
+            self.assertEqual(self.client.get(self.url, format='json').json(), first)
+        Protein.objects.filter(protein_id='protein0').delete()
+        bump_data_version()
+        self.assertEqual(len(self.client.get(self.url, format='json').json()['results']), 2)
+
+    # test nothing is cached without a data version (database migrated before the version row existed)
+    def test_not_cached_without_version(self):
+        DataVersion.objects.all().delete()
+        self.client.get(self.url, format='json')
+        Protein.objects.filter(protein_id='protein0').delete()
+        self.assertEqual(len(self.client.get(self.url, format='json').json()['results']), 2)
+
+
+# https://docs.djangoproject.com/en/4.2/topics/testing/tools/#liveservertestcase
+class WarmCacheTest(ResponseCacheMixin, LiveServerTestCase):
+    serialized_rollback = True # keeps the data version row of migration 0006 after every test
+
+    def setUp(self):
+        super().setUp()
+        # create objects
+        organism = Organism.objects.create(taxa_id=865, clade='E', genus='Genus865', species='Species865')
+        Protein.objects.create(protein_id='protein865', sequence='MKV', length=3, organism=organism)
+        self.directory = tempfile.mkdtemp()
+
+    # writes a file with lines and returns its path
+    def write(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    # test taxa and proteins are ranked by their requests in the access log
+    def test_access_log(self):
+        path = self.write('access.log', [
+            '127.0.0.1 - - [18/Oct/2026:12:00:00 +0000] "GET /api/proteins/865/ HTTP/1.1" 200 512',
+            '127.0.0.1 - - [18/Oct/2026:12:00:01 +0000] "GET /api/pfams/865/?cursor=abc HTTP/1.1" 200 512',
+            '127.0.0.1 - - [18/Oct/2026:12:00:02 +0000] "GET /api/pfams/7/ HTTP/1.1" 200 512',
+            '[18/Oct/2026 12:00:03] "GET /api/protein/protein865/ HTTP/1.1" 200 1024',
+            '127.0.0.1 - - [18/Oct/2026:12:00:04 +0000] "POST /api/coverage/ HTTP/1.1" 200 64',
+        ])
+        hits = read_access_log(path)
+        self.assertEqual(hits, {('taxa', '865'): 2, ('taxa', '7'): 1, ('protein', 'protein865'): 1})
+        self.assertEqual(paths_to_warm(hits, 1), ['/api/proteins/865/', '/api/pfams/865/', '/api/protein/protein865/', '/api/coverage/protein865/'])
+
+    # test popularity table is read
+    def test_popularity_table(self):
+        path = self.write('popularity.csv', ['kind,key,hits', 'taxa,865,10', 'protein,protein865,3', 'organism,1,99'])
+        self.assertEqual(read_popularity_table(path), {('taxa', '865'): 10, ('protein', 'protein865'): 3})
+
+    # test command requests the pages of the running server, which caches them
+    def test_command(self):
+        path = self.write('popularity.csv', ['kind,key,hits', 'taxa,865,10', 'protein,protein865,3'])
+        out = StringIO()
+        call_command('warm_cache', '--popularity', path, '--base-url', self.live_server_url, stdout=out)
+        self.assertIn('Warmed 4 of 4 pages', out.getvalue())
+        self.assertEqual(data_version(), 1) # the command does not write, the version of the migration is used
+        key = response_cache_key('ListProteinByTaxaView', 1, 'data', f"{self.live_server_url}/api/proteins/865/")
+        self.assertEqual(response_cache().get(key)[0]['results'][0]['protein_id'], 'protein865')
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
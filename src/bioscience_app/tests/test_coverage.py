@@ -0,0 +1,249 @@
+import io
+import json
+import random
+from unittest import mock
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from bioscience_app.models import Organism, Protein, Pfam, Domain, DomainAssignment, ProteinCoverage
+from django.core.management import call_command
+from bioscience_app.coverage import coverage_rows, protein_coverage, refresh_coverage
+from bioscience_app.signals import coverage_updates_paused
+from bioscience_app.caching import data_version
+from bioscience_app.views_api import BatchCoverageView
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# https://docs.djangoproject.com/en/4.2/topics/testing/tools/#testcase
+
+# covered positions counted one by one, used to check the SQL
+def covered_positions(intervals):
+    return len({position for start, end in intervals for position in range(start, end + 1)})
+
+class CoverageTest(TestCase):
+    def setUp(self):
+        # create objects
+        self.organism = Organism.objects.create(taxa_id=1, clade='E', genus='Genus865', species='Species865')
+        pfam = Pfam.objects.create(domain_id='PF865', domain_description='Description865')
+        self.domains = [Domain.objects.create(domain_description='Description865', pfam=pfam) for _ in range(4)]
+
+    # creates a protein with domains at intervals
+    def protein_with_domains(self, protein_id, length, intervals):
+        protein = Protein.objects.create(protein_id=protein_id, sequence='', length=length, organism=self.organism)
+        for number, (start, end) in enumerate(intervals):
+            DomainAssignment.objects.create(protein=protein, domain=self.domains[number % len(self.domains)], start=start, end=end)
+        return protein
+
+    # test overlapping and nested domains are counted once
+    def test_overlapping_domains(self):
+        self.protein_with_domains('protein1', 100, [(1, 20), (10, 30), (12, 15), (51, 60)])
+        coverage = protein_coverage('protein1')
+        self.assertAlmostEqual(coverage['coverage'], 0.40)
+        self.assertAlmostEqual(coverage['raw_coverage'], 0.55)
+
+    # test adjacent and disjoint domains
+    def test_adjacent_and_disjoint_domains(self):
+        self.protein_with_domains('protein1', 50, [(11, 20), (1, 10), (31, 40)])
+        self.assertEqual(protein_coverage('protein1'), {'coverage': 0.6, 'raw_coverage': 0.6})
+
+    # test protein without domains or without length
+    def test_protein_without_domains_or_length(self):
+        self.protein_with_domains('protein1', 10, [])
+        self.protein_with_domains('protein2', 0, [(1, 5)])
+        self.assertEqual(protein_coverage('protein1'), {'coverage': 0.0, 'raw_coverage': 0.0})
+        self.assertEqual(protein_coverage('protein2'), {'coverage': None, 'raw_coverage': None})
+        self.assertIsNone(protein_coverage('missing'))
+
+    # test SQL matches counting positions for random proteins with overlapping domains
+    def test_matches_counted_positions(self):
+        generator = random.Random(865)
+        intervals = {}
+        for number in range(40):
+            starts = [generator.randint(1, 80) for _ in range(generator.randint(0, 8))]
+            intervals[f"protein{number}"] = sorted({(start, start + generator.randint(0, 30)) for start in starts})
+            self.protein_with_domains(f"protein{number}", 110, intervals[f"protein{number}"])
+        rows = list(coverage_rows('taxa_id', [1], batch_size=7))
+        self.assertEqual([row[0] for row in rows], sorted(intervals))
+        for protein_id, length, raw_length, covered_length, domain_count in rows:
+            self.assertEqual(covered_length, covered_positions(intervals[protein_id]))
+            self.assertEqual(domain_count, len(intervals[protein_id]))
+            self.assertEqual(raw_length, sum(end - start + 1 for start, end in intervals[protein_id]))
+
+    # test only protein_id and taxa_id can select proteins
+    def test_unknown_column(self):
+        with self.assertRaises(ValueError):
+            list(coverage_rows('sequence', ['x']))
+
+
+class CoverageViewOverlapTest(APITestCase):
+    # test coverage view never goes above 1 for overlapping domains
+    def test_overlapping_domains_response(self):
+        organism = Organism.objects.create(taxa_id=1, clade='E', genus='Genus865', species='Species865')
+        protein = Protein.objects.create(protein_id='protein1', sequence='', length=10, organism=organism)
+        pfam = Pfam.objects.create(domain_id='PF865', domain_description='Description865')
+        for start in (1, 2):
+            domain = Domain.objects.create(domain_description='Description865', pfam=pfam)
+            DomainAssignment.objects.create(protein=protein, domain=domain, start=start, end=10)
+        with self.assertNumQueries(2): # ETag validators and the stored row
+            response = self.client.get(reverse('coverage', args=['protein1']), format='json')
+        self.assertEqual(response.json(), {'coverage': 1.0, 'raw_coverage': 1.9})
+
+# https://docs.djangoproject.com/en/4.2/ref/request-response/#streaminghttpresponse-objects
+class BatchCoverageViewTest(APITestCase):
+    def setUp(self):
+        # create 12 proteins with 2 overlapping domains each, protein11 belongs to another taxa
+        organism = Organism.objects.create(taxa_id=1, clade='E', genus='Genus865', species='Species865')
+        other = Organism.objects.create(taxa_id=2, clade='E', genus='Genus866', species='Species866')
+        pfam = Pfam.objects.create(domain_id='PF865', domain_description='Description865')
+        domain = Domain.objects.create(domain_description='Description865', pfam=pfam)
+        for number in range(12):
+            protein = Protein.objects.create(protein_id=f"protein{number:02d}", sequence='', length=100, organism=other if number == 11 else organism)
+            DomainAssignment.objects.create(protein=protein, domain=domain, start=1, end=number + 10)
+            DomainAssignment.objects.create(protein=protein, domain=domain, start=5, end=14)
+        self.url = reverse('coverage-batch')
+
+    # returns status and parsed JSON of a streamed response
+    def post(self, data):
+        response = self.client.post(self.url, data, format='json')
+        if response.streaming:
+            return response.status_code, json.loads(b''.join(response.streaming_content))
+        return response.status_code, response.json()
+
+    # test coverage of listed proteins, unknown proteins are reported as missing
+    def test_protein_ids(self):
+        status, data = self.post({'protein_ids': ['protein03', 'protein00', 'unknown', 'protein00']})
+        self.assertEqual(status, 200)
+        self.assertEqual(data['results'], [
+            {'protein_id': 'protein00', 'length': 100, 'coverage': 0.14, 'raw_coverage': 0.2},
+            {'protein_id': 'protein03', 'length': 100, 'coverage': 0.14, 'raw_coverage': 0.23},
+        ])
+        self.assertEqual(data['missing'], ['unknown'])
+
+    # test coverage of all proteins of a taxa, results match the single protein endpoint
+    def test_taxa_id(self):
+        status, data = self.post({'taxa_id': 1})
+        self.assertEqual(status, 200)
+        self.assertEqual([result['protein_id'] for result in data['results']], [f"protein{number:02d}" for number in range(11)])
+        single = self.client.get(reverse('coverage', args=['protein10'])).json()
+        self.assertEqual(data['results'][10]['coverage'], single['coverage'])
+        self.assertEqual(data['missing'], [])
+
+    # test results are the stored rows the single protein endpoint reads, proteins without a row are computed and stored
+    def test_reads_stored_coverage(self):
+        ProteinCoverage.objects.filter(protein_id='protein00').update(coverage=0.5)
+        ProteinCoverage.objects.filter(protein_id='protein01').delete()
+        status, data = self.post({'protein_ids': ['protein00', 'protein01']})
+        self.assertEqual([result['coverage'] for result in data['results']], [0.5, 0.14])
+        self.assertEqual(self.client.get(reverse('coverage', args=['protein00'])).json()['coverage'], 0.5)
+        self.assertTrue(ProteinCoverage.objects.filter(protein_id='protein01').exists())
+
+    # test large requests are queried in batches (proteins without a stored row, then the rows) and streamed in chunks
+    def test_batches_and_chunks(self):
+        with mock.patch.object(BatchCoverageView, 'COVERAGE_BATCH_SIZE', 5), mock.patch.object(BatchCoverageView, 'CHUNK_SIZE', 4):
+            response = self.client.post(self.url, {'protein_ids': [f"protein{number:02d}" for number in range(12)]}, format='json')
+            with self.assertNumQueries(6):
+                chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 5) # opening, 3 chunks of results and closing
+        self.assertEqual(len(json.loads(b''.join(chunks))['results']), 12)
+
+    # test invalid requests are rejected
+    def test_invalid_requests(self):
+        for data in ({}, [1, 2], 'x', {'protein_ids': ['protein00'], 'taxa_id': 1}, {'protein_ids': 'protein00'}, {'taxa_id': 'one'}):
+            status, body = self.post(data)
+            self.assertEqual(status, 400)
+            self.assertIn('error', body)
+
+# https://docs.djangoproject.com/en/4.2/topics/signals/
+class StoredCoverageTest(TestCase):
+    def setUp(self):
+        # create protein with one domain
+        self.organism = Organism.objects.create(taxa_id=1, clade='E', genus='Genus865', species='Species865')
+        self.protein = Protein.objects.create(protein_id='protein1', sequence='', length=100, organism=self.organism)
+        pfam = Pfam.objects.create(domain_id='PF865', domain_description='Description865')
+        self.domain = Domain.objects.create(domain_description='Description865', pfam=pfam)
+        self.assignment = DomainAssignment.objects.create(protein=self.protein, domain=self.domain, start=1, end=20)
+
+    # returns stored values of protein1
+    def stored(self):
+        return ProteinCoverage.objects.filter(protein_id='protein1').values('domain_count', 'covered_length', 'coverage').first()
+
+    # test saved domain assignments and changed length refresh stored coverage
+    def test_signals_keep_coverage_current(self):
+        self.assertEqual(self.stored(), {'domain_count': 1, 'covered_length': 20, 'coverage': 0.2})
+        DomainAssignment.objects.create(protein=self.protein, domain=self.domain, start=11, end=40)
+        self.assertEqual(self.stored(), {'domain_count': 2, 'covered_length': 40, 'coverage': 0.4})
+        self.protein.length = 200
+        self.protein.save()
+        self.assertEqual(self.stored(), {'domain_count': 2, 'covered_length': 40, 'coverage': 0.2})
+
+    # test domain assignments deleted in the admin site (directly or with their domain) refresh stored coverage
+    def test_admin_delete_refreshes_coverage(self):
+        other_domain = Domain.objects.create(domain_description='Description866', pfam=None)
+        DomainAssignment.objects.create(protein=self.protein, domain=other_domain, start=11, end=40)
+        self.client.force_login(User.objects.create_superuser('admin865', 'admin865@example.com', 'password'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:bioscience_app_domainassignment_delete', args=[self.assignment.pk]), {'post': 'yes'})
+        self.assertEqual(self.stored(), {'domain_count': 1, 'covered_length': 30, 'coverage': 0.3})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:bioscience_app_domain_changelist'), {'action': 'delete_selected', '_selected_action': [other_domain.pk], 'post': 'yes'})
+        self.assertEqual(self.stored(), {'domain_count': 0, 'covered_length': 0, 'coverage': 0.0})
+
+    # test domain assignments deleted through the ORM refresh stored coverage and the data version once, so a
+    # conditional GET of the coverage gets the new values instead of 304
+    def test_orm_delete_refreshes_coverage_and_version(self):
+        DomainAssignment.objects.create(protein=self.protein, domain=self.domain, start=50, end=59)
+        url = reverse('coverage', args=['protein1'])
+        etag = self.client.get(url)['ETag']
+        version = data_version()
+        with mock.patch('bioscience_app.signals.refresh_coverage', wraps=refresh_coverage) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                DomainAssignment.objects.filter(protein=self.protein).delete()
+        refresh.assert_called_once_with(['protein1'])
+        self.assertEqual(self.stored(), {'domain_count': 0, 'covered_length': 0, 'coverage': 0.0})
+        self.assertEqual(data_version(), version + 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['coverage'], 0.0)
+
+    # test deleted protein takes its stored coverage with it, the refresh after commit finds nothing left to store
+    def test_protein_delete(self):
+        for start in range(30, 80, 10):
+            DomainAssignment.objects.create(protein=self.protein, domain=self.domain, start=start, end=start + 5)
+        with mock.patch('bioscience_app.signals.refresh_coverage', wraps=refresh_coverage) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.protein.delete()
+        refresh.assert_called_once_with(['protein1'])
+        self.assertFalse(ProteinCoverage.objects.exists())
+        self.assertFalse(DomainAssignment.objects.exists())
+
+    # test paused updates leave stored coverage alone
+    def test_paused_updates(self):
+        with coverage_updates_paused():
+            DomainAssignment.objects.create(protein=self.protein, domain=self.domain, start=50, end=59)
+        self.assertEqual(self.stored()['domain_count'], 1)
+        refresh_coverage(['protein1'])
+        self.assertEqual(self.stored()['domain_count'], 2)
+
+    # test coverage view reads the stored row with one query (after the ETag validators), proteins without a row are
+    # computed and stored
+    def test_view_reads_stored_row(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('coverage', args=['protein1']))
+        self.assertEqual(response.json(), {'coverage': 0.2, 'raw_coverage': 0.2})
+        ProteinCoverage.objects.all().delete()
+        self.assertEqual(self.client.get(reverse('coverage', args=['protein1'])).json()['coverage'], 0.2)
+        self.assertEqual(self.stored()['covered_length'], 20)
+
+    # test rebuild command stores the same values as the signals
+    def test_rebuild_command(self):
+        Protein.objects.create(protein_id='protein2', sequence='', length=0, organism=self.organism)
+        expected = list(ProteinCoverage.objects.order_by('protein_id').values())
+        ProteinCoverage.objects.all().delete()
+        call_command('rebuild_coverage', stdout=io.StringIO())
+        self.assertEqual(list(ProteinCoverage.objects.order_by('protein_id').values()), expected)
+        self.assertIsNone(ProteinCoverage.objects.get(protein_id='protein2').coverage)
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
@@ -0,0 +1,63 @@
+import io
+from unittest import mock
+from django.test import TestCase
+from django.db.models import F
+from bioscience_app.models import Organism, Protein, Pfam, Domain, DomainAssignment
+from scripts import generate_data
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# https://docs.djangoproject.com/en/4.2/topics/testing/tools/#testcase
+
+# returns every generated row so two runs can be compared
+def generated_rows():
+    return (
+        list(Organism.objects.order_by('id').values_list('id', 'taxa_id', 'clade', 'genus', 'species')),
+        list(Protein.objects.order_by('protein_id').values_list('protein_id', 'sequence', 'length', 'organism_id', 'id_custom')),
+        list(Domain.objects.order_by('id').values_list('id', 'pfam_id')),
+        list(DomainAssignment.objects.order_by('protein_id', 'start').values_list('protein_id', 'domain_id', 'start', 'end')),
+    )
+
+class GenerateDataTest(TestCase):
+    # the five tables are filled with the requested number of rows
+    def test_counts(self):
+        counts = generate_data.generate_database(300, organisms=20, pfams=15, chunk_size=128, progress=False)
+        self.assertEqual(Organism.objects.count(), 20)
+        self.assertEqual(Pfam.objects.count(), 15)
+        self.assertEqual(Domain.objects.count(), 15)
+        self.assertEqual(Protein.objects.count(), 300)
+        self.assertEqual(DomainAssignment.objects.count(), counts['domain_assignments'])
+        self.assertGreaterEqual(counts['domain_assignments'], 300) # at least one domain per protein
+
+    # sequences match their length and domains lie inside their protein
+    def test_values_are_consistent(self):
+        generate_data.generate_database(200, progress=False)
+        for sequence, length in Protein.objects.values_list('sequence', 'length'):
+            self.assertEqual(len(sequence), length)
+            self.assertTrue(set(sequence) <= set("ARNDCQEGHILKMFPSTWYV"))
+        self.assertFalse(DomainAssignment.objects.filter(start__gte=F('end')).exists())
+        self.assertFalse(DomainAssignment.objects.filter(end__gt=F('protein__length')).exists())
+
+    # the same seed and chunk_size (values are drawn chunk by chunk) give the same database, generating again replaces
+    # the previous data
+    def test_seed_is_reproducible(self):
+        generate_data.generate_database(150, seed=7, chunk_size=64, progress=False)
+        first = generated_rows()
+        generate_data.generate_database(150, seed=7, chunk_size=64, progress=False, replace=True)
+        self.assertEqual(generated_rows(), first)
+        generate_data.generate_database(150, seed=8, chunk_size=64, progress=False, replace=True)
+        self.assertNotEqual(generated_rows(), first)
+
+    # a database with data is kept unless replace is given
+    def test_existing_data_needs_replace(self):
+        Organism.objects.create(taxa_id=865, clade='E', genus='Genus865', species='Species865')
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as output:
+            self.assertIsNone(generate_data.generate_database(50, progress=False))
+        self.assertIn('--replace', output.getvalue())
+        self.assertEqual(list(Organism.objects.values_list('taxa_id', flat=True)), [865])
+        generate_data.generate_database(50, organisms=10, progress=False, replace=True)
+        self.assertEqual(Organism.objects.count(), 10)
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
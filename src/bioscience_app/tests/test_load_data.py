@@ -0,0 +1,394 @@
+import os
+import json
+import gzip
+import bz2
+import tempfile
+from unittest import mock
+from django.test import TestCase, SimpleTestCase
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from bioscience_app.models import Organism, Protein, Pfam, Domain, DomainAssignment, ProteinCoverage
+from bioscience_app.tests.base import ResponseCacheTestCase
+from scripts import load_data, load_pipeline, benchmark_load
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# https://docs.python.org/3/library/tempfile.html
+# https://docs.python.org/3/library/gzip.html
+# https://docs.djangoproject.com/en/4.2/topics/testing/tools/#testcase
+
+FASTA_LINES = [
+    ">sp|P12345|TEST_HUMAN Test protein OS=Homo sapiens",
+    "MKVLA",
+    "agtw",
+    "",
+    ">A0A016SS41 existing protein",
+    "MSTNPKPQRKTKRNTNRRPQDVKFPGG",
+    ">A0A016BAD1 invalid residues",
+    "MK1L",
+]
+
+ASSIGNMENT_ROWS = [
+    "A0A014PQC0,568076,E,Metarhizium robertsii,Glyceraldehyde 3-phosphate dehydrogenase catalytic domain,PF02800,157,314,338",
+    "A0A016S8J7,53326,E,Ancylostoma ceylanicum,Peptidase C13 legumain,PF01650,40,94,101",
+    "A0A016S8J7,53326,E,Ancylostoma ceylanicum,Neurotransmitter-gated ion-channel ligand-binding domain,PF02931,23,39,101",
+    "A0A016S8J7,53326,E,Ancylostoma ceylanicum,Neurotransmitter-gated ion-channel ligand-binding domain,PF02931,23,39,101",
+    "A0A016SS41,53326,E,Ancylostoma ceylanicum,Other description for legumain,PF01650,1,50,120",
+    "A0A014PQC0,568076,E,Metarhizium robertsii extra,Glyceraldehyde 3-phosphate dehydrogenase catalytic domain,PF02800,10,20,340",
+]
+
+# writes rows into a temporary CSV file and returns its path, opener allows to compress the file
+def write_csv(rows, opener=open):
+    handle, path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    with opener(path, 'wt') as f:
+        f.write("\n".join(rows))
+    return path
+
+# returns the content of the database without auto-increment ids
+def database_state():
+    return {
+        'organisms': sorted(Organism.objects.values_list('taxa_id', 'clade', 'genus', 'species')),
+        'proteins': sorted(Protein.objects.values_list('protein_id', 'sequence', 'length', 'organism__taxa_id', 'id_custom', 'taxa_id')),
+        'pfams': sorted(Pfam.objects.values_list('domain_id', 'domain_description')),
+        'domains': sorted(Domain.objects.values_list('pfam_id', 'domain_description')),
+        'assignments': sorted(DomainAssignment.objects.values_list('protein_id', 'domain__pfam_id', 'start', 'end', 'taxa_id')),
+        'coverage': sorted(ProteinCoverage.objects.values_list('protein_id', 'domain_count', 'covered_length', 'coverage')),
+    }
+
+
+class BulkAssignmentLoaderTest(TestCase):
+    def setUp(self):
+        self.path = write_csv(ASSIGNMENT_ROWS)
+        # protein with a sequence loaded before the assignment data set
+        organism = Organism.objects.create(taxa_id=-1, clade='', genus='Unspecified', species='Unspecified')
+        Protein.objects.create(protein_id='A0A016SS41', sequence='MKV', organism=organism)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    # bulk loader gives the same database as the row-by-row loader
+    def test_bulk_matches_row_by_row(self):
+        load_data.load_assignment_data_set(self.path, progress=False)
+        expected = database_state()
+        DomainAssignment.objects.all().delete()
+        Domain.objects.all().delete()
+        Pfam.objects.all().delete()
+        Protein.objects.exclude(protein_id='A0A016SS41').delete()
+        Protein.objects.update(length=0, id_custom=None, organism=Organism.objects.get(genus='Unspecified'))
+        Organism.objects.exclude(genus='Unspecified').delete()
+
+        load_data.load_assignment_data_set_bulk(self.path, chunk_size=2, progress=False)
+        self.assertEqual(database_state(), expected)
+
+    # row-by-row loader refreshes stored coverage once per batch, not after every saved row
+    def test_row_loader_refreshes_coverage_per_batch(self):
+        with mock.patch.object(load_data, 'refresh_coverage', wraps=load_data.refresh_coverage) as refresh, \
+                mock.patch('bioscience_app.signals.refresh_coverage') as refresh_by_signal:
+            load_data.load_assignment_data_set(self.path, batch_size=2, progress=False)
+        self.assertEqual(refresh.call_count, 3)
+        refresh_by_signal.assert_not_called()
+        self.assertEqual(ProteinCoverage.objects.get(protein_id='A0A016S8J7').domain_count, 2)
+
+    # existing sequence is kept and id_custom counts every row
+    def test_bulk_keeps_sequence_and_counts_rows(self):
+        load_data.load_assignment_data_set_bulk(self.path, chunk_size=4, progress=False)
+        protein = Protein.objects.get(protein_id='A0A016SS41')
+        self.assertEqual(protein.sequence, 'MKV')
+        self.assertEqual(protein.id_custom, 80005)
+        self.assertEqual(Protein.objects.get(protein_id='A0A014PQC0').id_custom, 80006)
+
+    # loading the same file twice does not duplicate anything
+    def test_bulk_is_idempotent(self):
+        load_data.load_assignment_data_set_bulk(self.path, progress=False)
+        first = database_state()
+        load_data.load_assignment_data_set_bulk(self.path, progress=False)
+        self.assertEqual(database_state(), first)
+        self.assertEqual(DomainAssignment.objects.count(), 5)
+
+    # copied taxa_id follows the organism of a protein when a later load moves it
+    def test_bulk_sets_taxa_id(self):
+        load_data.load_assignment_data_set_bulk(self.path, progress=False)
+        self.assertFalse(Protein.objects.exclude(taxa_id=F('organism__taxa_id')).exists())
+        self.assertFalse(DomainAssignment.objects.exclude(taxa_id=F('protein__taxa_id')).exists())
+        moved = write_csv([row.replace(",53326,", ",99999,") for row in ASSIGNMENT_ROWS])
+        load_data.load_assignment_data_set_bulk(moved, progress=False)
+        os.remove(moved)
+        self.assertEqual(DomainAssignment.objects.filter(protein_id='A0A016S8J7').get(domain__pfam_id='PF01650').taxa_id, 99999)
+        self.assertFalse(DomainAssignment.objects.exclude(taxa_id=F('protein__taxa_id')).exists())
+
+
+# bulk loader which stops at the second chunk like an interrupted load
+class InterruptedBulkLoader(load_data.BulkAssignmentLoader):
+    def load_chunk(self, records):
+        if self.id_custom > 80000:
+            raise RuntimeError("interrupted")
+        super().load_chunk(records)
+
+
+class CheckpointTest(TestCase):
+    def setUp(self):
+        self.path = write_csv(ASSIGNMENT_ROWS)
+        self.checkpoint_path = self.path + '.checkpoint.json'
+
+    def tearDown(self):
+        for path in (self.path, self.checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # interrupted load saves a checkpoint and --resume continues after the last committed chunk
+    def test_resume_after_interruption(self):
+        load_data.load_assignment_file(InterruptedBulkLoader, self.path, batch_size=2, progress=False)
+        checkpoint = json.load(open(self.checkpoint_path))
+        self.assertEqual(checkpoint['id_custom'], 80002)
+        self.assertEqual(checkpoint['offset'], len(ASSIGNMENT_ROWS[0]) + len(ASSIGNMENT_ROWS[1]) + 2)
+        self.assertEqual(Protein.objects.count(), 2)
+
+        load_data.load_assignment_data_set_bulk(self.path, chunk_size=2, progress=False, resume=True)
+        self.assertEqual(Protein.objects.get(protein_id='A0A016SS41').id_custom, 80005)
+        self.assertEqual(Protein.objects.get(protein_id='A0A014PQC0').id_custom, 80006)
+        self.assertEqual(DomainAssignment.objects.count(), 5)
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    # checkpoint of a file which changed since is not used
+    def test_checkpoint_of_changed_file_is_ignored(self):
+        load_data.load_assignment_file(InterruptedBulkLoader, self.path, batch_size=2, progress=False)
+        with open(self.path, 'a') as f:
+            f.write("\nA0A016TEY5,6282,E,Necator americanus,Other domain,PF00008,1,10,50")
+        self.assertIsNone(load_pipeline.Checkpoint(self.path).load())
+
+class DeltaLoadTest(ResponseCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = write_csv(ASSIGNMENT_ROWS)
+        self.manifest_path = self.path + '.manifest.json'
+
+    def tearDown(self):
+        for path in (self.path, self.manifest_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def rewrite(self, rows):
+        with open(self.path, 'w') as f:
+            f.write("\n".join(rows))
+
+    # first delta load (no manifest) loads everything like the bulk loader
+    def test_first_delta_load_is_full_load(self):
+        load_data.load_assignment_data_set_bulk(self.path, progress=False)
+        expected = database_state()
+        DomainAssignment.objects.all().delete()
+        Protein.objects.all().delete()
+
+        load_data.load_assignment_data_set_delta(self.path, progress=False)
+        self.assertEqual(database_state(), expected)
+        self.assertTrue(os.path.exists(self.manifest_path))
+
+    # only inserted, changed and deleted proteins are applied
+    def test_delta_applies_changes(self):
+        load_data.load_assignment_data_set_delta(self.path, progress=False)
+        Protein.objects.filter(protein_id='A0A014PQC0').update(id_custom=1)
+
+        rows = [row for row in ASSIGNMENT_ROWS if not row.startswith('A0A016S8J7')] # protein removed
+        rows[1] = "A0A016SS41,53326,E,Ancylostoma ceylanicum,Other description for legumain,PF01650,5,60,120" # changed
+        rows.append("A0A016TEY5,6282,E,Necator americanus,Peptidase C13 legumain,PF01650,1,10,50") # new protein
+        self.rewrite(rows)
+        load_data.load_assignment_data_set_delta(self.path, progress=False)
+
+        self.assertFalse(Protein.objects.filter(protein_id='A0A016S8J7').exists())
+        self.assertEqual(list(DomainAssignment.objects.filter(protein_id='A0A016SS41').values_list('start', 'end')), [(5, 60)])
+        self.assertEqual(Protein.objects.get(protein_id='A0A016SS41').id_custom, 80002)
+        self.assertEqual(Protein.objects.get(protein_id='A0A016TEY5').id_custom, 80004)
+        self.assertEqual(Protein.objects.get(protein_id='A0A014PQC0').id_custom, 1) # not rewritten
+        self.assertEqual(DomainAssignment.objects.count(), 4)
+
+    # ids of proteins inserted between unchanged proteins start after the ids of the unchanged proteins
+    def test_delta_ids_do_not_repeat(self):
+        rows = [f"P0000{number},53326,E,Ancylostoma ceylanicum,Peptidase C13 legumain,PF01650,1,10,50" for number in range(3)]
+        self.rewrite(rows)
+        load_data.load_assignment_data_set_delta(self.path, progress=False)
+        self.rewrite(rows[:1] + ["P00009,53326,E,Ancylostoma ceylanicum,Peptidase C13 legumain,PF01650,1,10,50"] + rows[1:])
+        load_data.load_assignment_data_set_delta(self.path, progress=False)
+
+        ids = dict(Protein.objects.values_list('protein_id', 'id_custom'))
+        self.assertEqual(ids, {'P00000': 80001, 'P00001': 80002, 'P00002': 80003, 'P00009': 80005})
+        response = self.client.get("/api/proteins/53326/", HTTP_ACCEPT='application/json')
+        self.assertEqual(len({record['id'] for record in response.json()['results']}), 4)
+
+class DeleteDuplicatesTest(TestCase):
+    def setUp(self):
+        # organisms without taxa_id are not covered by the unique constraint
+        self.kept = Organism.objects.create(taxa_id=None, clade='E', genus='Necator', species='americanus')
+        self.duplicate = Organism.objects.create(taxa_id=None, clade='E', genus='Necator', species='americanus')
+        self.other = Organism.objects.create(taxa_id=None, clade='E', genus='Necator', species='other')
+        Protein.objects.create(protein_id='protein1', organism=self.kept)
+        Protein.objects.create(protein_id='protein2', organism=self.duplicate)
+
+    # duplicates are merged into the organism with the lowest id and their proteins are kept
+    def test_duplicates_are_merged(self):
+        self.assertEqual(load_data.delete_duplicates(), 1)
+        self.assertEqual(set(Organism.objects.values_list('id', flat=True)), {self.kept.id, self.other.id})
+        self.assertEqual(set(Protein.objects.values_list('organism_id', flat=True)), {self.kept.id})
+
+    # nothing to merge the second time
+    def test_no_duplicates(self):
+        load_data.delete_duplicates()
+        self.assertEqual(load_data.delete_duplicates(), 0)
+
+class PfamDescriptionLoaderTest(TestCase):
+    def setUp(self):
+        pfam = Pfam.objects.create(domain_id='PF01650', domain_description='Peptidase C13 legumain')
+        Domain.objects.create(pfam=pfam, domain_description='old description')
+        Domain.objects.create(pfam=pfam, domain_description='old description')
+        Domain.objects.create(pfam=Pfam.objects.create(domain_id='PF02800', domain_description='GAPDH'), domain_description='GAPDH')
+        self.path = write_csv(["PF01650,first description", "PF09999,unknown pfam", "PF01650,legumain"])
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    # every domain of a pfam gets the (last) description of the file with a fixed number of queries
+    def test_descriptions_are_updated(self):
+        with CaptureQueriesContext(connection) as queries:
+            load_data.load_data_pfam_descriptions(self.path, progress=False)
+        self.assertEqual(list(Domain.objects.filter(pfam_id='PF01650').values_list('domain_description', flat=True)), ['legumain', 'legumain'])
+        self.assertEqual(Domain.objects.get(pfam_id='PF02800').domain_description, 'GAPDH')
+        loader_queries = [query for query in queries.captured_queries if 'dataversion' not in query['sql']] # data version is bumped once per load
+        self.assertLessEqual(len([query for query in loader_queries if query['sql'].startswith(('SELECT', 'UPDATE'))]), 2)
+
+class FastaSequenceLoaderTest(TestCase):
+    def setUp(self):
+        self.path = write_csv(FASTA_LINES, gzip.open)
+        organism = Organism.objects.create(taxa_id=53326, clade='E', genus='Ancylostoma', species='ceylanicum')
+        Protein.objects.create(protein_id='A0A016SS41', sequence='', length=0, organism=organism)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    # existing proteins get sequence and length, new proteins are created and invalid records skipped
+    def test_load_fasta_sequences(self):
+        load_data.load_fasta_sequences(self.path, batch_size=2, progress=False)
+        existing = Protein.objects.get(protein_id='A0A016SS41')
+        self.assertEqual((existing.sequence, existing.length, existing.organism.genus), ('MSTNPKPQRKTKRNTNRRPQDVKFPGG', 27, 'Ancylostoma'))
+        created = Protein.objects.get(protein_id='P12345')
+        self.assertEqual((created.sequence, created.length, created.organism.genus), ('MKVLAAGTW', 9, 'Unspecified'))
+        self.assertFalse(Protein.objects.filter(protein_id='A0A016BAD1').exists())
+
+class LoadPipelineTest(SimpleTestCase):
+    def setUp(self):
+        self.paths = []
+
+    def tearDown(self):
+        for path in self.paths:
+            os.remove(path)
+
+    def csv_file(self, rows, opener=open):
+        path = write_csv(rows, opener)
+        self.paths.append(path)
+        return path
+
+    # rows are split into fixed-size batches with offsets at line ends
+    def test_batches_have_fixed_size(self):
+        path = self.csv_file(ASSIGNMENT_ROWS)
+        batches = list(load_pipeline.iter_batches(path, batch_size=4))
+        self.assertEqual([len(batch.rows) for batch in batches], [4, 2])
+        self.assertEqual(batches[-1].offset, os.path.getsize(path))
+        self.assertEqual(batches[0].rows[1][0], 'A0A016S8J7')
+
+    # reading can start from the offset of a previous batch
+    def test_batches_start_offset(self):
+        path = self.csv_file(ASSIGNMENT_ROWS)
+        first = next(load_pipeline.iter_batches(path, batch_size=4))
+        rest = list(load_pipeline.iter_batches(path, batch_size=4, start_offset=first.offset))
+        self.assertEqual(rest[0].rows[0][0], 'A0A016SS41')
+
+    # gzip and bz2 files give the same rows as the plain file
+    def test_compressed_files(self):
+        expected = list(load_pipeline.iter_batches(self.csv_file(ASSIGNMENT_ROWS), parse=load_data.parse_assignment_row))
+        for opener in (gzip.open, bz2.open):
+            path = self.csv_file(ASSIGNMENT_ROWS, opener)
+            self.assertEqual(list(load_pipeline.iter_batches(path, parse=load_data.parse_assignment_row)), expected)
+
+    # writer receives every batch and errors while reading reach the caller
+    def test_run_pipeline(self):
+        written = []
+        total = load_pipeline.run_pipeline(self.csv_file(ASSIGNMENT_ROWS), written.append, batch_size=5, progress=False)
+        self.assertEqual(total, 6)
+        self.assertEqual([len(rows) for rows in written], [5, 1])
+
+        bad_file = self.csv_file(["A0A014PQC0,not a number,E,Metarhizium robertsii,x,PF02800,1,2,3"])
+        with self.assertRaises(ValueError):
+            load_pipeline.run_pipeline(bad_file, written.append, parse=load_data.parse_assignment_row, progress=False)
+
+    # byte ranges cover every line exactly once, whatever the range size
+    def test_byte_ranges_cover_file(self):
+        path = self.csv_file(ASSIGNMENT_ROWS)
+        size = os.path.getsize(path)
+        for range_size in range(1, size + 1):
+            rows = []
+            for start in range(0, size, range_size):
+                rows.extend(load_pipeline.read_byte_range(path, start, min(start + range_size, size)).rows)
+            self.assertEqual([",".join(row) for row in rows], ASSIGNMENT_ROWS)
+
+    # parsing in worker processes gives the batches in file order
+    def test_run_pipeline_with_workers(self):
+        path = self.csv_file(ASSIGNMENT_ROWS * 50)
+        written = []
+        total = load_pipeline.run_pipeline(path, written.extend, parse=load_data.parse_assignment_row, batch_size=7, progress=False, workers=2)
+        self.assertEqual(total, 300)
+        self.assertEqual(written, [load_data.parse_assignment_row(row.split(",")) for row in ASSIGNMENT_ROWS * 50])
+
+    # FASTA records are parsed lazily into batches, offsets point to the next header
+    def test_fasta_batches(self):
+        path = self.csv_file(FASTA_LINES)
+        batches = list(load_pipeline.iter_fasta_batches(path, batch_size=2))
+        self.assertEqual([record.protein_id for batch in batches for record in batch.rows], ['P12345', 'A0A016SS41', 'A0A016BAD1'])
+        self.assertEqual(batches[0].rows[0].sequence, 'MKVLAAGTW')
+        rest = list(load_pipeline.iter_fasta_batches(path, batch_size=2, start_offset=batches[0].offset))
+        self.assertEqual(rest[0].rows, batches[1].rows)
+        self.assertEqual(load_pipeline.invalid_residues('MK1L'), {'1'})
+
+# https://docs.djangoproject.com/en/4.2/topics/testing/tools/#testcase
+class BenchmarkLoadTest(TestCase):
+    # https://docs.python.org/3/library/tempfile.html#tempfile.TemporaryDirectory
+    def setUp(self):
+        # synthetic files are written to a directory which is removed after the test
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.directory = temporary.name
+
+    # the synthetic file has the requested number of rows and the same seed gives the same file
+    def test_generate_assignment_file(self):
+        first = benchmark_load.generate_assignment_file(os.path.join(self.directory, 'a.csv'), 250, seed=1)
+        second = benchmark_load.generate_assignment_file(os.path.join(self.directory, 'b.csv'), 250, seed=1)
+        with open(first) as f:
+            rows = f.read().splitlines()
+        self.assertEqual(len(rows), 250)
+        with open(second) as f:
+            self.assertEqual(f.read().splitlines(), rows)
+        load_data.parse_assignment_row(rows[0].split(",")) # rows have the shape of the assignment data set
+
+    # every mode loads the whole file and reports its measurements
+    def test_measure_load(self):
+        path = benchmark_load.generate_assignment_file(os.path.join(self.directory, 'a.csv'), 200)
+        for mode in ('row', 'bulk', 'delta'):
+            result = benchmark_load.measure_load(path, 200, mode, chunk_size=64, profile_top_n=3)
+            self.assertEqual(result['domain_assignments'], DomainAssignment.objects.count())
+            self.assertGreater(result['domain_assignments'], 0)
+            self.assertGreater(result['queries'], 0)
+            self.assertEqual(len(result['profile']), 3)
+
+    # a second delta run loads the whole file again, a failed or incomplete load is an error and not a fast run
+    def test_measure_load_fails_loudly(self):
+        path = benchmark_load.generate_assignment_file(os.path.join(self.directory, 'a.csv'), 100)
+        first = benchmark_load.measure_load(path, 100, 'delta', chunk_size=64, profile_top_n=0)
+        second = benchmark_load.measure_load(path, 100, 'delta', chunk_size=64, profile_top_n=0)
+        self.assertEqual(second['domain_assignments'], first['domain_assignments'])
+        with self.assertRaises(RuntimeError):
+            benchmark_load.measure_load(path + '.missing', 100, 'bulk', profile_top_n=0)
+        with mock.patch.object(benchmark_load.load_data.BulkAssignmentLoader, 'create_domain_assignments', lambda self, records: None): # no assignments written
+            with self.assertRaises(RuntimeError):
+                benchmark_load.measure_load(path, 100, 'bulk', profile_top_n=0)
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
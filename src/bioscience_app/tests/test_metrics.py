@@ -0,0 +1,137 @@
+import os
+import tempfile
+import threading
+from django.test import TestCase
+from django.urls import reverse
+from bioscience_app.models import Organism, Protein
+from bioscience_app.metrics import MetricsRegistry, registry, retire_process_file, clear_directory
+from bioscience_app.tests.base import ResponseCacheTestCase
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+
+class MetricsRegistryTest(TestCase):
+    # test counters and histograms are rendered in the Prometheus text format with cumulative buckets
+    def test_render(self):
+        metrics = MetricsRegistry(buckets=(0.1, 1.0))
+        metrics.inc('requests_total', {'route': 'protein-detail'})
+        metrics.inc('requests_total', {'route': 'protein-detail'})
+        for seconds in (0.05, 0.5, 3):
+            metrics.observe('duration_seconds', seconds, {'route': 'protein-detail'})
+        lines = metrics.render().splitlines()
+        self.assertIn('# TYPE requests_total counter', lines)
+        self.assertIn('requests_total{route="protein-detail"} 2', lines)
+        self.assertIn('# TYPE duration_seconds histogram', lines)
+        self.assertIn('duration_seconds_bucket{route="protein-detail",le="0.1"} 1', lines)
+        self.assertIn('duration_seconds_bucket{route="protein-detail",le="1"} 2', lines)
+        self.assertIn('duration_seconds_bucket{route="protein-detail",le="+Inf"} 3', lines)
+        self.assertIn('duration_seconds_sum{route="protein-detail"} 3.55', lines)
+        self.assertIn('duration_seconds_count{route="protein-detail"} 3', lines)
+
+    # test label values are escaped
+    def test_label_escaping(self):
+        metrics = MetricsRegistry()
+        metrics.inc('requests_total', {'route': 'a"b\\c\nd'})
+        self.assertIn('requests_total{route="a\\"b\\\\c\\nd"} 1', metrics.render())
+
+    # test counts of all threads are added up
+    def test_threads(self):
+        metrics = MetricsRegistry(buckets=(1.0,))
+        def record():
+            for _ in range(1000):
+                metrics.inc('requests_total')
+                metrics.observe('duration_seconds', 0.5)
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['counters'][('requests_total', ())], 8000)
+        self.assertEqual(snapshot['histograms'][('duration_seconds', ())], [8000, 0, 4000.0])
+
+    # test shards of finished threads are added up and dropped, so one thread per request does not keep its shard
+    def test_short_lived_threads(self):
+        metrics = MetricsRegistry(buckets=(1.0,))
+        for _ in range(200):
+            thread = threading.Thread(target=lambda: (metrics.inc('requests_total'), metrics.observe('duration_seconds', 0.5)))
+            thread.start()
+            thread.join()
+            self.assertLessEqual(len(metrics._shards), 1)
+        snapshot = metrics.snapshot()
+        self.assertEqual(len(metrics._shards), 0)
+        self.assertEqual(snapshot['counters'][('requests_total', ())], 200)
+        self.assertEqual(snapshot['histograms'][('duration_seconds', ())], [200, 0, 100.0])
+
+    # test totals written by other worker processes are added to the totals of this process
+    def test_worker_files(self):
+        directory = tempfile.mkdtemp()
+        other_worker = MetricsRegistry(directory=directory)
+        other_worker.inc('requests_total', {'route': 'coverage'}, 5)
+        other_worker.observe('duration_seconds', 0.2, {'route': 'coverage'})
+        other_worker.dump(force=True)
+        os.replace(os.path.join(directory, f"metrics_{os.getpid()}.json"), os.path.join(directory, "metrics_1.json"))
+
+        metrics = MetricsRegistry(directory=directory)
+        metrics.inc('requests_total', {'route': 'coverage'}, 2)
+        text = metrics.render()
+        self.assertIn('requests_total{route="coverage"} 7', text)
+        self.assertIn('duration_seconds_count{route="coverage"} 1', text)
+
+    # test the file of an exited worker is kept in the retired totals and a new worker with its pid starts from zero
+    def test_retired_worker(self):
+        directory = tempfile.mkdtemp()
+        for requests in (5, 3): # two workers which exited, with the same pid
+            worker = MetricsRegistry(directory=directory)
+            worker.inc('requests_total', value=requests)
+            worker.dump(force=True)
+            retire_process_file(directory, os.getpid())
+        self.assertEqual(os.listdir(directory), ["metrics_retired.json"])
+        metrics = MetricsRegistry(directory=directory)
+        metrics.inc('requests_total')
+        self.assertIn('requests_total 9', metrics.render())
+        clear_directory(directory) # new run of the server
+        self.assertEqual(os.listdir(directory), [])
+        self.assertIn('requests_total 1', metrics.render())
+
+    # test dumps are skipped until dump_interval has passed
+    def test_dump_interval(self):
+        directory = tempfile.mkdtemp()
+        metrics = MetricsRegistry(directory=directory, dump_interval=3600)
+        metrics.dump()
+        metrics.dump()
+        self.assertEqual(os.listdir(directory), [f"metrics_{os.getpid()}.json"])
+        os.remove(os.path.join(directory, f"metrics_{os.getpid()}.json"))
+        metrics.dump()
+        self.assertEqual(os.listdir(directory), [])
+
+
+class MetricsEndpointTest(ResponseCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        # create objects
+        organism = Organism.objects.create(taxa_id=1, clade='E', genus='Genus866', species='Species866')
+        Protein.objects.create(protein_id='protein866', sequence='MKV', length=3, organism=organism)
+        registry.reset()
+
+    # test requests are counted per route name with their status and latency
+    def test_route_metrics(self):
+        self.client.get(reverse('protein-detail', args=['protein866']))
+        self.client.get(reverse('protein-detail', args=['missing']))
+        self.client.get(reverse('protein_by_taxa', args=[1]))
+        self.client.get('/no/such/page/')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('bioscience_requests_total{method="GET",route="protein-detail",status="200"} 1', text)
+        self.assertIn('bioscience_requests_total{method="GET",route="protein-detail",status="404"} 1', text)
+        self.assertIn('bioscience_requests_total{method="GET",route="protein_by_taxa",status="200"} 1', text)
+        self.assertIn('bioscience_requests_total{method="GET",route="unmatched",status="404"} 1', text)
+        self.assertIn('bioscience_request_duration_seconds_count{method="GET",route="protein-detail"} 2', text)
+        self.assertIn('bioscience_request_duration_seconds_bucket{method="GET",route="protein-detail",le="+Inf"} 2', text)
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
@@ -0,0 +1,76 @@
+import json
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.core.exceptions import MiddlewareNotUsed
+from bioscience_app.models import Organism, Protein
+from bioscience_app.middleware import PerformanceMiddleware
+from bioscience_app.tests.base import ResponseCacheTestCase
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# https://docs.djangoproject.com/en/4.2/topics/testing/tools/#django.test.override_settings
+# https://docs.python.org/3/library/unittest.html#unittest.TestCase.assertLogs
+
+@override_settings(PERFORMANCE_TIMING=True, SLOW_REQUEST_MS=100000)
+class PerformanceMiddlewareTest(ResponseCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        # create objects
+        organism = Organism.objects.create(taxa_id=1, clade='E', genus='Genus865', species='Species865')
+        Protein.objects.create(protein_id='protein865', sequence='MKV', length=3, organism=organism)
+        self.url = reverse('protein-detail', args=['protein865'])
+
+    # returns Server-Timing header as {name: (duration, description)}
+    def server_timing(self, response):
+        timings = {}
+        for metric in response['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            values = dict(param.split('=', 1) for param in params)
+            timings[name] = (float(values['dur']), values.get('desc'))
+        return timings
+
+    # test response has db, serializer and total timings with the number of queries
+    def test_server_timing_header(self):
+        response = self.client.get(self.url)
+        timings = self.server_timing(response)
+        self.assertEqual(set(timings), {'db', 'serializer', 'total'})
+        self.assertEqual(timings['db'][1], '"3 queries"') # ETag validators, protein and domains
+        self.assertGreaterEqual(timings['total'][0], timings['db'][0])
+
+    # test every request is logged as one JSON line
+    def test_request_log_line(self):
+        with self.assertLogs('bioscience_app.performance', level='INFO') as logs:
+            self.client.get(self.url)
+        record = json.loads(logs.records[0].getMessage().split(' ', 1)[1])
+        self.assertEqual(record['path'], self.url)
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 3)
+        self.assertNotIn('sql', record)
+
+    # test slow requests are logged as warnings with their SQL
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_request_logs_sql(self):
+        with self.assertLogs('bioscience_app.performance', level='WARNING') as logs:
+            self.client.get(self.url)
+        self.assertEqual(logs.records[0].levelname, 'WARNING')
+        record = json.loads(logs.records[0].getMessage().split(' ', 2)[-1])
+        self.assertEqual(len(record['sql']), 3)
+        self.assertTrue(any('bioscience_app_protein' in query['sql'] for query in record['sql']))
+
+    # test streamed responses get the header too
+    def test_streamed_response(self):
+        response = self.client.get(reverse('protein_by_taxa', args=[1]) + '?stream=1')
+        self.assertTrue(response.streaming)
+        self.assertIn('total', self.server_timing(response))
+
+    # test disabled middleware removes itself from the chain
+    @override_settings(PERFORMANCE_TIMING=False)
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            PerformanceMiddleware(lambda request: None)
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
@@ -5,6 +5,7 @@ from rest_framework import status
 from rest_framework.test import APIClient, APIRequestFactory, APITestCase
 import factory
 from bioscience_app.models import Organism, Protein, Pfam, Domain, DomainAssignment
+from bioscience_app.tests.base import ResponseCacheTestCase
 from .factories import FactoryForOrganism, FactoryForProtein, FactoryForPfam, FactoryForDomain, FactoryForDomainAssignment
 from django.db.utils import IntegrityError
 
@@ -39,6 +40,38 @@ class OrganismModelPassingTest(TestCase):
         self.assertEqual(str(organism), '2, Clade865, Genus865, Species865')
     
 
+class TaxaIdCopyTest(TestCase):
+    def setUp(self):
+        # create objects
+        self.organism = Organism.objects.create(taxa_id=1, clade='Clade865', genus='Genus865', species='Species865')
+        self.other = Organism.objects.create(taxa_id=2, clade='Clade865', genus='Genus866', species='Species866')
+        self.protein = Protein.objects.create(protein_id='protein865', sequence='sequence865', length=18, organism=self.organism)
+        pfam = Pfam.objects.create(domain_id='PF865', domain_description='Description865')
+        domain = Domain.objects.create(domain_description='Description865', pfam=pfam)
+        self.assignment = DomainAssignment.objects.create(protein=self.protein, domain=domain, start=1, end=10)
+
+    # test taxa_id is copied from organism to protein and domain assignment
+    def test_taxa_id_is_copied(self):
+        self.assertEqual(Protein.objects.get(pk='protein865').taxa_id, 1)
+        self.assertEqual(DomainAssignment.objects.get(pk=self.assignment.pk).taxa_id, 1)
+
+    # test changed taxa_id of organism reaches protein and domain assignment
+    def test_organism_taxa_id_change(self):
+        organism = Organism.objects.get(pk=self.organism.pk)
+        organism.taxa_id = 5
+        organism.save()
+        self.assertEqual(Protein.objects.get(pk='protein865').taxa_id, 5)
+        self.assertEqual(DomainAssignment.objects.get(pk=self.assignment.pk).taxa_id, 5)
+
+    # test protein moved to another organism moves its domain assignments too
+    def test_protein_moved_to_other_organism(self):
+        protein = Protein.objects.get(pk='protein865')
+        protein.organism = self.other
+        protein.save()
+        self.assertEqual(Protein.objects.get(pk='protein865').taxa_id, 2)
+        self.assertEqual(DomainAssignment.objects.get(pk=self.assignment.pk).taxa_id, 2)
+
+
 class ProteinModelPassingTest(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -122,8 +155,9 @@ class PfamModelPassingTest2(TestCase):
         with self.assertRaises(Exception):
             Pfam.objects.create(domain_id='domain865', domain_description='description865')
 
-class ProteinListPassingTest(TestCase):
+class ProteinListPassingTest(ResponseCacheTestCase):
     def setUp(self):
+        super().setUp()
         # test client
         self.client = APIClient()
 
@@ -153,7 +187,7 @@ class ProteinListPassingTest(TestCase):
     # test response data length
     def test_expected_protein_list_view_data_length(self):
         response = self.client.get(reverse("protein-list"))
-        self.assertEqual(len(response.data), 4)
+        self.assertEqual(len(response.data), 3) # next, previous and results
 
     # test response is 200 for indicated taxa_id 
     def test_protein_list_view_with_taxa_id_status_code_200(self):
@@ -165,7 +199,7 @@ class ProteinListPassingTest(TestCase):
     def test_protein_list_view_with_taxa_id_data_length(self):
         url = reverse("protein_by_taxa", kwargs={"taxa_id": self.organism.taxa_id})
         response = self.client.get(url)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
 # ############### # END TESTS using Django's built-in ORM
 
@@ -0,0 +1,95 @@
+import json
+import uuid
+import decimal
+import datetime
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from bioscience_app import renderers
+from bioscience_app.renderers import FastJSONRenderer
+from bioscience_app.tests.base import ResponseCacheAPITestCase
+from .factories import FactoryForProtein, FactoryForDomainAssignment
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# https://www.django-rest-framework.org/api-guide/renderers/#jsonrenderer
+
+class FastJSONRendererTest(TestCase):
+    # test output is the same bytes as JSONRenderer for the types DRF encodes
+    def test_same_output(self):
+        data = {
+            'text': 'ünïcode \u2028 line \u2029 paragraph "quoted"',
+            'numbers': [1, -2, 0.55, 1.0, True, None],
+            'nested': {'list': [{'a': 1}], 'tuple': (1, 2)},
+            'lazy': gettext_lazy('Protein'),
+            'decimal': decimal.Decimal('1.5'),
+            'uuid': uuid.UUID(int=865),
+            'datetime': datetime.datetime(2026, 10, 18, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2026, 10, 18),
+            1: 'integer key',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    # test line and paragraph separators are escaped
+    def test_separators_escaped(self):
+        self.assertEqual(FastJSONRenderer().render({'a': '\u2028\u2029'}), b'{"a":"\\u2028\\u2029"}')
+
+    # test indented output and values orjson can not encode are rendered by JSONRenderer
+    def test_fallbacks(self):
+        data = {'big': 2 ** 70, 'list': [1]}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = FastJSONRenderer().render({'list': [1]}, 'application/json; indent=4')
+        self.assertEqual(indented, JSONRenderer().render({'list': [1]}, 'application/json; indent=4'))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    # test NaN and infinity are rejected like JSONRenderer does, not written as null
+    def test_non_finite_floats_rejected(self):
+        for value in (float('nan'), float('inf'), decimal.Decimal('-Infinity')):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({'coverage': value, 'raw_coverage': None})
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({'coverage': value, 'raw_coverage': None})
+        self.assertEqual(FastJSONRenderer().render({'coverage': None}), b'{"coverage":null}')
+
+    # test coverage floats: usual values are the same bytes, tiny values only differ in the exponent form of the
+    # same number (0.00001 instead of 1e-05)
+    def test_coverage_floats(self):
+        for coverage in (0.2, 1.0, 1 / 3, 0.123456789):
+            data = {'coverage': coverage, 'raw_coverage': coverage}
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        data = {'coverage': 1e-05, 'raw_coverage': 3.2e-07}
+        self.assertEqual(FastJSONRenderer().render(data), b'{"coverage":0.00001,"raw_coverage":3.2e-7}')
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+    # test renderer works without orjson installed
+    def test_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render({'a': [1, 2]}), b'{"a":[1,2]}')
+
+
+class FastJSONRendererViewTest(ResponseCacheAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # create protein with several domains
+        self.protein = FactoryForProtein.create(protein_id="protein865")
+        for start in range(1, 4):
+            FactoryForDomainAssignment.create(protein=self.protein, start=start, end=start + 10)
+
+    # test the API renders JSON with FastJSONRenderer and the bytes are the same as with JSONRenderer
+    def test_protein_response(self):
+        response = self.client.get(reverse('protein-detail', args=['protein865']), format='json')
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    # test coverage response (floats) is rendered with the same bytes as with JSONRenderer
+    def test_coverage_response(self):
+        response = self.client.get(reverse('coverage', args=['protein865']), format='json')
+        self.assertIsInstance(response.data['coverage'], float)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments. 
+# Please review links below and short commentary in readme.txt. Thank you.
@@ -2,16 +2,24 @@ from rest_framework.test import APITestCase
 from django.urls import reverse
 import json
 from .factories import FactoryForProtein, FactoryForOrganism, FactoryForDomain, FactoryForPfam, FactoryForDomainAssignment
-from bioscience_app.models import Protein, DomainAssignment
+from bioscience_app.models import Protein, Domain, DomainAssignment
+from bioscience_app.serializers import SerializerForProteinByTaxa, SerializerForDomainByTaxa
 from django.test import TestCase, Client
+from bioscience_app.views_api import ListProteinByTaxaView, ListDomainByTaxaView, ProteinCursorPagination, ProjectedListMixin
+from rest_framework.generics import ListAPIView
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from bioscience_app.tests.base import ResponseCacheAPITestCase
 
 # START: I wrote the code based on documentation and references. Important links were included in the comments. 
 # Please review links below and short commentary in readme.txt. Thank you.
 
 # https://developer.mozilla.org/en-US/docs/Learn/Server-side/Django/Testing
 
-class ProteinAPITest(APITestCase):
+class ProteinAPITest(ResponseCacheAPITestCase):
     def setUp(self):
+        super().setUp()
         # create protein objects with FactoryForProtein 
         self.protein1 = FactoryForProtein.create(pk=1, protein_id="protein1")
         self.protein2 = FactoryForProtein.create(pk=2, protein_id="protein2")
@@ -55,8 +63,9 @@ class ProteinAPITest(APITestCase):
         FactoryForProtein.reset_sequence(0)
 
 
-class ListProteinByTaxaViewTest(APITestCase):
+class ListProteinByTaxaViewTest(ResponseCacheAPITestCase):
     def setUp(self):
+        super().setUp()
         # create organism using FactoryForOrganism
         self.organism = FactoryForOrganism.create()
         # create protein object using FactoryForProtein and assign it to organism 
@@ -77,8 +86,8 @@ class ListProteinByTaxaViewTest(APITestCase):
         response = self.client.get(self.good_url, format='json')
         # load  JSON data
         data = json.loads(response.content)
-        # validate response is a list
-        self.assertTrue(isinstance(data, list), "Response data is a list.")
+        # validate response results is a list
+        self.assertTrue(isinstance(data['results'], list), "Response data is a list.")
 
     # testing response is not empty  
     def test_get_proteins_by_taxa_is_not_empty(self):
@@ -87,7 +96,7 @@ class ListProteinByTaxaViewTest(APITestCase):
         # load response as JSON data
         data = json.loads(response.content)
         # validate response is not empty
-        self.assertTrue(data, "Response data should not be empty")
+        self.assertTrue(data['results'], "Response data should not be empty")
 
     # test 1st element has a protein_id
     def test_get_proteins_by_taxa_1st_element_is_protein_id(self):
@@ -96,7 +105,7 @@ class ListProteinByTaxaViewTest(APITestCase):
         # load data as JSON
         data = json.loads(response.content)
         # validate 1st element has a 'protein_id'
-        self.assertTrue('protein_id' in data[0], "Response data has 1st element as protein_id.")
+        self.assertTrue('protein_id' in data['results'][0], "Response data has 1st element as protein_id.")
 
     # testing returns empty list without data 
     def test_get_proteins_by_taxa_returns_empty_list_no_data(self):
@@ -107,7 +116,7 @@ class ListProteinByTaxaViewTest(APITestCase):
         # load data as JSON
         data = json.loads(response.content)
         # validate response data is empty list
-        self.assertEqual(len(data), 0, "Response data is an empty list without proteins for specified taxa.")
+        self.assertEqual(len(data['results']), 0, "Response data is an empty list without proteins for specified taxa.")
         
     # tear down by deleting objects
     def tearDown(self):
@@ -115,8 +124,9 @@ class ListProteinByTaxaViewTest(APITestCase):
         self.protein.delete()
 
 
-class ListDomainByTaxaViewTest(APITestCase):
+class ListDomainByTaxaViewTest(ResponseCacheAPITestCase):
     def setUp(self):
+        super().setUp()
         self.organism = FactoryForOrganism.create()
         self.protein = FactoryForProtein.create(organism=self.organism)
         self.domain = FactoryForDomain.create()
@@ -132,26 +142,26 @@ class ListDomainByTaxaViewTest(APITestCase):
     def test_get_domains_by_taxa_is_list(self):
         response = self.client.get(self.good_url, format='json')
         data = response.json()
-        self.assertTrue(isinstance(data, list), "Response is a list of data.")
+        self.assertTrue(isinstance(data['results'], list), "Response is a list of data.")
 
     # test response data is not empty
     def test_get_domains_by_taxa_is_not_empty(self):
         response = self.client.get(self.good_url, format='json')
         data = response.json()
-        self.assertTrue(len(data) >= 1, "Response data is not empty.")
+        self.assertTrue(len(data['results']) >= 1, "Response data is not empty.")
 
     # test 1st element is data with pfam_id
     def test_get_domains_by_taxa_1st_element_contains_pfam_id(self):
         response = self.client.get(self.good_url, format='json')
         data = response.json()
-        self.assertTrue('pfam_id' in data[0], "First element should have 'pfam_id'")
+        self.assertTrue('pfam_id' in data['results'][0], "First element should have 'pfam_id'")
 
     # testing for an empty list 
     def test_get_domains_by_taxa_no_data_list_is_empty(self):
         DomainAssignment.objects.filter(protein=self.protein).delete()
         response = self.client.get(self.good_url, format='json')
         data = response.json()
-        self.assertEqual(len(data), 0, "Response is an empty list.")
+        self.assertEqual(len(data['results']), 0, "Response is an empty list.")
 
     # delete onjects
     def tearDown(self):
@@ -293,8 +303,9 @@ class CreateNewProteinViewTest2(APITestCase):
 
 
 
-class RetrieveProteinByIDViewTest(APITestCase):
+class RetrieveProteinByIDViewTest(ResponseCacheAPITestCase):
     def setUp(self):
+        super().setUp()
         # create object
         self.protein = FactoryForProtein.create()  
         # good URL 
@@ -319,8 +330,9 @@ class RetrieveProteinByIDViewTest(APITestCase):
 
 
 
-class RetrievePfamDetailsViewTest(APITestCase):
+class RetrievePfamDetailsViewTest(ResponseCacheAPITestCase):
     def setUp(self):
+        super().setUp()
         # create object 
         self.pfam = FactoryForPfam.create() 
         # good URL 
@@ -415,5 +427,171 @@ class SwaggerReDocTests(TestCase):
         response = self.client.get('/admin/login/?next=/api/swagger/')
         self.assertContains(response, 'Log in')  
 
+# https://docs.djangoproject.com/en/4.2/topics/testing/tools/#django.test.TransactionTestCase.assertNumQueries
+class ProteinQueryCountTest(ResponseCacheAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # create protein with several domains
+        self.protein = FactoryForProtein.create(protein_id="protein865")
+        for start in range(1, 6):
+            FactoryForDomainAssignment.create(protein=self.protein, start=start, end=start + 10)
+        FactoryForProtein.create(protein_id="protein866")
+
+    # test protein is retrieved with 2 queries whatever number of domains it has (and the ETag validators)
+    def test_retrieve_protein_query_count(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('protein-detail', args=[self.protein.protein_id]), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['domains']), 5)
+
+    # test protein list page is read with page and domain queries only (and the data version of the ETag)
+    def test_list_proteins_query_count(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('protein-list') + '?page_size=10', format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(len(protein['domains']) for protein in response.data['results']), 5)
+
+# https://www.django-rest-framework.org/api-guide/pagination/#cursorpagination
+class CursorPaginationTest(ResponseCacheAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # create 7 proteins of one taxa with a domain each
+        self.organism = FactoryForOrganism.create(taxa_id=865)
+        for number in range(7):
+            protein = FactoryForProtein.create(protein_id=f"protein{number}", organism=self.organism)
+            FactoryForDomainAssignment.create(protein=protein)
+
+    # follows next links from url and returns results of all pages and number of pages
+    def all_pages(self, url):
+        results, pages = [], 0
+        while url:
+            data = self.client.get(url, format='json').json()
+            results.extend(data['results'])
+            pages += 1
+            url = data['next']
+        return results, pages
+
+    # test pages of proteins by taxa follow protein_id order without repeating records
+    def test_proteins_by_taxa_pages(self):
+        results, pages = self.all_pages(reverse('protein_by_taxa', args=[865]) + '?page_size=3')
+        self.assertEqual([result['protein_id'] for result in results], [f"protein{number}" for number in range(7)])
+        self.assertEqual(pages, 3)
+
+    # test pages of domains by taxa and of the protein list
+    def test_domains_by_taxa_and_protein_list_pages(self):
+        results, pages = self.all_pages(reverse('domain_by_taxa', args=[865]) + '?page_size=2')
+        self.assertEqual(len(results), 7)
+        self.assertEqual(pages, 4)
+        results, pages = self.all_pages(reverse('protein-list'))
+        self.assertEqual(len(results), 7) # one protein per page by default
+        self.assertEqual(pages, 7)
+
+    # test page size is capped
+    def test_page_size_is_capped(self):
+        with mock.patch.object(ProteinCursorPagination, 'max_page_size', 4):
+            data = self.client.get(reverse('protein_by_taxa', args=[865]) + '?page_size=1000', format='json').json()
+        self.assertEqual(len(data['results']), 4)
+
+    # test a later page starts after the last protein_id of the previous page instead of skipping rows with OFFSET
+    def test_later_page_uses_keyset(self):
+        next_url = self.client.get(reverse('protein_by_taxa', args=[865]) + '?page_size=3', format='json').json()['next']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(next_url, format='json')
+        sql = queries.captured_queries[1]['sql'] # after the ETag validators
+        self.assertIn('"protein_id" > ', sql)
+        self.assertNotIn('OFFSET', sql)
+
+# https://docs.djangoproject.com/en/4.2/ref/request-response/#streaminghttpresponse-objects
+class StreamProteinsByTaxaTest(ResponseCacheAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # create 5 proteins of one taxa
+        organism = FactoryForOrganism.create(taxa_id=865)
+        for number in range(5):
+            FactoryForProtein.create(protein_id=f"protein{number}", organism=organism, id_custom=number)
+        self.url = reverse('protein_by_taxa', args=[865])
+        self.expected = [{'id': number, 'protein_id': f"protein{number}"} for number in range(5)]
+
+    # test ?stream=1 returns all proteins as one JSON list written in chunks
+    def test_stream_json_list(self):
+        with mock.patch.object(ListProteinByTaxaView, 'STREAM_CHUNK_SIZE', 2):
+            response = self.client.get(self.url + '?stream=1')
+            chunks = list(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(len(chunks), 5) # opening, 3 chunks of proteins and closing
+        self.assertEqual(json.loads(b''.join(chunks)), self.expected)
+
+    # test NDJSON accept type returns one protein per line
+    def test_stream_ndjson(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected)
+
+    # test empty taxa streams an empty list, without stream the response is paginated
+    def test_empty_and_paginated(self):
+        response = self.client.get(reverse('protein_by_taxa', args=[866]) + '?stream=1')
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+        response = self.client.get(self.url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.json()['results'], self.expected)
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#values-list
+class ProjectedTaxaListTest(ResponseCacheAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # create 4 proteins of one taxa with a domain each, the last domain has no pfam
+        organism = FactoryForOrganism.create(taxa_id=865)
+        for number in range(4):
+            protein = FactoryForProtein.create(protein_id=f"protein{number}", organism=organism, id_custom=number)
+            domain = FactoryForDomain.create(pfam=None) if number == 3 else FactoryForDomain.create()
+            FactoryForDomainAssignment.create(protein=protein, domain=domain)
+
+    # test records built from values_list are the same as the records of the serializers
+    def test_same_records_as_serializers(self):
+        proteins = self.client.get(reverse('protein_by_taxa', args=[865]), format='json').json()['results']
+        expected = SerializerForProteinByTaxa(Protein.objects.filter(taxa_id=865).order_by('protein_id'), many=True).data
+        self.assertEqual(proteins, json.loads(json.dumps(expected)))
+        domains = self.client.get(reverse('domain_by_taxa', args=[865]), format='json').json()['results']
+        expected = SerializerForDomainByTaxa(Domain.objects.order_by('id'), many=True).data
+        self.assertEqual(domains, json.loads(json.dumps(expected)))
+        self.assertIsNone(domains[-1]['pfam_id'])
+
+    # test a view using the mixin has to say how rows become records
+    def test_represent_is_required(self):
+        class IncompleteView(ProjectedListMixin, ListAPIView):
+            projection = ('protein_id',)
+        with self.assertRaises(TypeError):
+            IncompleteView()
+
+    # test a page is read with one query (and the data version of the ETag), pfams are joined instead of read per domain
+    def test_page_query_count(self):
+        with self.assertNumQueries(2):
+            self.client.get(reverse('protein_by_taxa', args=[865]), format='json')
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('domain_by_taxa', args=[865]), format='json')
+        self.assertEqual(len(response.json()['results']), 4)
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#explain
+# https://www.sqlite.org/eqp.html
+class TaxaQueryPlanTest(TestCase):
+    # returns query plan of the queryset of a by-taxa view
+    def query_plan(self, view_class):
+        view = view_class(kwargs={'taxa_id': 1})
+        return view.get_queryset().explain()
+
+    # test proteins of a taxa are read with an index range scan
+    def test_protein_by_taxa_uses_index(self):
+        plan = self.query_plan(ListProteinByTaxaView)
+        self.assertIn('protein_taxa_idx', plan)
+        self.assertNotIn('SCAN', plan)
+
+    # test domains of a taxa are read with an index range scan and without joins
+    def test_domain_by_taxa_uses_index(self):
+        plan = self.query_plan(ListDomainByTaxaView)
+        self.assertIn('domain_assignment_taxa_idx', plan)
+        self.assertNotIn('SCAN', plan)
+        self.assertNotIn('bioscience_app_protein', plan)
+
 # END: I wrote the code based on documentation and references. Important links were included in the comments. 
 # Please review links below and short commentary in readme.txt. Thank you.
\ No newline at end of file
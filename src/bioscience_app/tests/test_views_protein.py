@@ -4,6 +4,7 @@ from bioscience_app.models import Protein, Organism, Domain, Pfam, DomainAssignm
 from ..forms import NewProteinForm 
 from django.core.exceptions import ValidationError
 from ..views_protein import data_validation, if_data_exists
+from .base import ResponseCacheTestCase
 
 # START: I wrote the code based on documentation and references. Important links were included in the comments. 
 # Please review links below and short commentary in readme.txt. Thank you.
@@ -55,6 +56,44 @@ class ViewsProteinTests(TestCase):
         response = self.client.post(reverse('new_protein_form_page'), data)
 
 
+# https://docs.djangoproject.com/en/4.2/topics/http/middleware/
+class DuplicateProteinStatusTests(ResponseCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        # create objects
+        self.organism = Organism.objects.create(taxa_id=1, clade='E', genus='Genus865', species='Species865')
+        Protein.objects.create(protein_id='protein865', sequence='MKV', length=3, organism=self.organism)
+
+    # form data for a new protein
+    def form_data(self, protein_id):
+        return {'protein_id': protein_id, 'sequence': 'MKV', 'length': 3, 'organism': self.organism.pk}
+
+    # test form with an existing protein_id is shown again with 400
+    def test_duplicate_protein_is_400(self):
+        response = self.client.post(reverse('new_protein_form_page'), self.form_data('protein865'))
+        self.assertEqual(response.status_code, 400)
+        self.assertContains(response, 'Protein with this ID already exists', status_code=400)
+
+    # test other form errors keep 200
+    def test_other_errors_are_200(self):
+        data = self.form_data('protein866')
+        data['length'] = 'not a number'
+        response = self.client.post(reverse('new_protein_form_page'), data)
+        self.assertEqual(response.status_code, 200)
+
+    # test body containing the error text is not changed, only the view decides
+    def test_body_is_not_scanned(self):
+        Protein.objects.filter(pk='protein865').update(sequence='Protein with this ID already exists')
+        response = self.client.get(reverse('protein-detail', args=['protein865']))
+        self.assertEqual(response.status_code, 200)
+
+    # test streamed responses pass through the middleware
+    def test_streamed_response(self):
+        response = self.client.get(reverse('protein_by_taxa', args=[1]) + '?stream=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+
 class ProteinModelValidationTests(TestCase):
     def test_data_validation(self):
         # data for the validation
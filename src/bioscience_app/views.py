@@ -1,5 +1,7 @@
 from django.views.generic import TemplateView
 from django.shortcuts import render
+from django.http import HttpResponse
+from .metrics import registry
 
 
 # START: I wrote the code based on documentation and references. Important links were included in the comments next to each function. 
@@ -16,5 +18,10 @@ def SPA(request):
 class IndexView(TemplateView):
     template_name = 'bioscience_app/spa.html'
 
+# https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+# request counters and latency histograms of all worker processes in the Prometheus text format
+def metrics(request):
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # END: I wrote the code based on documentation and references. Important links were included in the comments next to each function. 
 # Please review links below and short commentary in readme.txt. Thank you.
\ No newline at end of file
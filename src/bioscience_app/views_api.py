@@ -1,66 +1,322 @@
 from django.shortcuts import get_object_or_404, render
 from rest_framework import generics
 from rest_framework.response import Response
-from .models import Protein, Organism, Domain,  Pfam  
+from .models import Protein, Domain,  Pfam  
 from .serializers import SerializerForProtein, DomainAssignment, SerializerForPfam, SerializerForProteinByTaxa, SerializerForDomainByTaxa
 from rest_framework.views import APIView
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.pagination import CursorPagination
+from django.db.models import Prefetch
+from django.db import transaction
+from .coverage import stored_protein_coverage, stored_coverage_rows
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+from .renderers import NDJSONRenderer
+from .middleware import timed_serializer
+from .caching import data_version_state, object_version_state, bump_data_version, response_cache, response_cache_key, cached_computation
+from django.views.decorators.http import condition
+import abc
+import hashlib
+from django.http import HttpResponse
+import json
 
 
 # START: I wrote the code based on documentation and references. Important links were included in the comments next to each function. 
 # Please review links below and short commentary in readme.txt. Thank you.
 
+# https://www.django-rest-framework.org/api-guide/generic-views/#get_serializerself-instancenone-datanone-manyfalse-partialfalse
+# serializers of model instances are evaluated (.data) right away so PerformanceMiddleware can time serialization,
+# .data is cached by the serializer so the view does not serialize twice
+class TimedSerializerMixin:
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if args and 'data' not in kwargs: # reading instances (list/retrieve), not validating input
+            with timed_serializer():
+                serializer.data
+        return serializer
+
+# versions of the data behind a response, read once per request: {'version', 'changed_at', 'last_modified'} where
+# last_modified is the stamp of the requested row of lookup_model (detail views) or None (lists), None when the
+# requested row does not exist
+class DataStateMixin:
+    lookup_model = None # model of the row looked up by lookup_field, None for list views
+
+    def data_state(self):
+        if not hasattr(self, '_data_state'):
+            self._data_state = self.read_data_state()
+        return self._data_state
+
+    def read_data_state(self):
+        if self.lookup_model is None:
+            version, changed_at = data_version_state()
+            return {'version': version, 'changed_at': changed_at, 'last_modified': None}
+        state = object_version_state(self.lookup_model, **{self.lookup_field: self.kwargs[self.lookup_field]})
+        if state is None:
+            return None
+        last_modified, version, changed_at = state
+        return {'version': version, 'changed_at': changed_at, 'last_modified': last_modified}
+
+# https://docs.djangoproject.com/en/4.2/topics/conditional-view-processing/
+# https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/ETag
+# GET answers with a strong ETag made of the data version, the last_modified stamp of the requested row, the response
+# format, the accepted media type with its parameters (indented JSON is another representation) and the full path
+# (query string included), and Last-Modified. Both are known before the view runs, so a
+# request with a matching If-None-Match (or If-Modified-Since) gets 304 Not Modified without serializing anything.
+# Missing rows get no ETag and the view answers 404.
+class ConditionalGetMixin(DataStateMixin):
+    def etag(self, request, *args, **kwargs):
+        state = self.data_state()
+        if state is None:
+            return None
+        validator = f"{state['version']}:{state['last_modified']}:{request.accepted_renderer.format}:{request.accepted_media_type}:{request.get_full_path()}"
+        return hashlib.sha1(validator.encode()).hexdigest()
+
+    def last_modified(self, request, *args, **kwargs):
+        state = self.data_state()
+        if state is None:
+            return None
+        stamps = [stamp for stamp in (state['changed_at'], state['last_modified']) if stamp is not None]
+        return max(stamps) if stamps else None
+
+    # view function answering 304 when the client has the current version
+    def conditional(self, view):
+        return condition(etag_func=self.etag, last_modified_func=self.last_modified)(view)
+
+    def get(self, request, *args, **kwargs):
+        return self.conditional(super().get)(request, *args, **kwargs)
+
+# https://docs.djangoproject.com/en/4.2/ref/template-response/#post-render-callbacks
+# https://www.django-rest-framework.org/api-guide/renderers/#determining-which-renderer-to-use
+# GET of a detail view is answered from the response cache when the same object was rendered in the same format since
+# the last change of the data (see caching.py). Only JSON is cached, the browsable API page depends on the user.
+# The accepted media type with its parameters is part of the key, so "application/json; indent=4" is cached apart
+# from compact JSON. Missing objects (404) are never cached.
+class VersionedResponseCacheMixin(DataStateMixin):
+    cached_formats = ('json',)
+
+    def get(self, request, *args, **kwargs):
+        response_format = request.accepted_renderer.format
+        state = self.data_state()
+        if response_format not in self.cached_formats or state is None:
+            return super().get(request, *args, **kwargs)
+        cache = response_cache()
+        key = response_cache_key(type(self).__name__, f"{state['version']}:{state['last_modified'].timestamp()}", response_format, (request.accepted_media_type, kwargs[self.lookup_field]))
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(lambda rendered: cache.set(key, (rendered.content, rendered['Content-Type'])))
+        return response
+
+# pages of a list view are computed once per data version and page URL and kept for list_cache_timeout seconds, a
+# cold or expiring page is computed by one request while concurrent requests wait for it (see cached_computation).
+# The version row is created by migration 0006, without it (data version 0) nothing is cached.
+class CachedListMixin(DataStateMixin):
+    list_cache_timeout = 300 # seconds
+
+    def list(self, request, *args, **kwargs):
+        version = self.data_state()['version']
+        if not version:
+            return super().list(request, *args, **kwargs)
+        key = response_cache_key(type(self).__name__, version, 'data', request.build_absolute_uri()) # host is part of next/previous links
+        data = cached_computation(key, lambda: super(CachedListMixin, self).list(request, *args, **kwargs).data, self.list_cache_timeout)
+        return Response(data)
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#values-list
+# read-only list of a few columns: rows are read with values_list() (named tuples, cursor pagination reads the ordering
+# field from them) and turned into the JSON records of serializer_class by represent(), no model instances are built
+# and no serializer fields run. serializer_class still describes the records (browsable API, tests compare both).
+# https://docs.python.org/3/library/abc.html#abc.abstractmethod
+class ProjectedListMixin(abc.ABC):
+    projection = () # columns read for a record, the ordering field of the pagination included
+
+    def projected_queryset(self):
+        return self.filter_queryset(self.get_queryset()).values_list(*self.projection, named=True)
+
+    # records of rows (tuples of the projection columns), same shape as serializer_class
+    @abc.abstractmethod
+    def represent(self, rows):
+        pass
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.projected_queryset()
+        page = self.paginate_queryset(queryset)
+        with timed_serializer():
+            data = self.represent(page if page is not None else queryset)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+# https://www.django-rest-framework.org/api-guide/pagination/#cursorpagination
+# keyset pagination: a page starts after the last key of the previous page (WHERE key > ... ORDER BY key LIMIT n),
+# so every page costs the same whatever its depth. ?page_size= changes the size of a page up to max_page_size.
+class ProteinCursorPagination(CursorPagination):
+    ordering = 'protein_id' # unique and indexed
+    page_size = 100 # default number of records on a page
+    page_size_query_param = 'page_size' # allows ?page_size=500
+    max_page_size = 1000 # largest allowed page
+
+# cursor pagination for the Protein page, one record by default like before so it loads faster
+class ProteinListCursorPagination(ProteinCursorPagination):
+    page_size = 1
+
+# cursor pagination for domains (ordered by id)
+class DomainCursorPagination(ProteinCursorPagination):
+    ordering = 'id'
+
 # https://www.django-rest-framework.org/api-guide/generic-views/#genericapiview
 # https://www.django-rest-framework.org/api-guide/generic-views/#listapiview
 # handles view for Protein by Taxa
-class ListProteinByTaxaView(generics.ListAPIView):
+# https://docs.djangoproject.com/en/4.2/ref/request-response/#streaminghttpresponse-objects
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#iterator
+# handles view for Protein by Taxa, ?stream=1 (JSON list) or "Accept: application/x-ndjson" (one protein per line)
+# sends all proteins of the taxa without pagination, they are read STREAM_CHUNK_SIZE rows at a time and written as
+# soon as they are serialized so memory use does not grow with the number of proteins
+class ListProteinByTaxaView(ConditionalGetMixin, CachedListMixin, ProjectedListMixin, generics.ListAPIView):
     serializer_class = SerializerForProteinByTaxa
+    projection = ('id_custom', 'protein_id') # sequences are not read
+    pagination_class = ProteinCursorPagination # pages in protein_id order (index on taxa_id, protein_id)
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer] # allows Accept: application/x-ndjson
+    STREAM_CHUNK_SIZE = 2000 # rows read from the database and serialized at a time
 
     def get_queryset(self):
         taxa_id = self.kwargs['taxa_id'] # get taxa_id from the URL
-        organisms = Organism.objects.filter(taxa_id=taxa_id) # get organisms with indicated taxa_id
-        return Protein.objects.filter(organism__in=organisms) # get proteins from organism 
+        return Protein.objects.filter(taxa_id=taxa_id) # get proteins with indicated taxa_id (copied from organism, indexed)
+
+    def list(self, request, *args, **kwargs):
+        ndjson = request.accepted_renderer.format == 'ndjson'
+        if ndjson or request.query_params.get('stream') in ('1', 'true'):
+            queryset = self.projected_queryset().order_by('protein_id')
+            content_type = NDJSONRenderer.media_type if ndjson else 'application/json'
+            return StreamingHttpResponse(self.stream(queryset, ndjson), content_type=content_type)
+        return super().list(request, *args, **kwargs)
+
+    # yields serialized proteins one chunk at a time, as a JSON list or as NDJSON lines
+    def stream(self, queryset, ndjson):
+        chunk = []
+        separator = ''
+        if not ndjson:
+            yield '['
+        for row in queryset.iterator(chunk_size=self.STREAM_CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) == self.STREAM_CHUNK_SIZE:
+                yield separator + self.serialize(chunk, ndjson)
+                separator = '' if ndjson else ', '
+                chunk = []
+        if chunk:
+            yield separator + self.serialize(chunk, ndjson)
+        if not ndjson:
+            yield ']'
+
+    # serializes one chunk of proteins
+    def serialize(self, rows, ndjson):
+        records = [json.dumps(record) for record in self.represent(rows)]
+        return ''.join(record + '\n' for record in records) if ndjson else ', '.join(records)
+
+    # SerializerForProteinByTaxa records
+    def represent(self, rows):
+        return [{'id': id_custom, 'protein_id': protein_id} for id_custom, protein_id in rows]
 
 # https://www.django-rest-framework.org/api-guide/generic-views/#genericapiview
 # https://www.django-rest-framework.org/api-guide/generic-views/#listapiview
 # handles view for Domain by Taxa
-class ListDomainByTaxaView(generics.ListAPIView):
+class ListDomainByTaxaView(ConditionalGetMixin, CachedListMixin, ProjectedListMixin, generics.ListAPIView):
     serializer_class = SerializerForDomainByTaxa
+    pagination_class = DomainCursorPagination # pages in id order
+    projection = ('id', 'pfam__domain_id', 'pfam__domain_description') # pfam is joined, not read once per domain
 
     def get_queryset(self):
         taxa_id = self.kwargs['taxa_id'] # get taxa_id from the URL
-        domain_assignments = DomainAssignment.objects.filter(protein__organism__taxa_id=taxa_id) # get domain assignments from proteins with indicated taxa_id
+        domain_assignments = DomainAssignment.objects.filter(taxa_id=taxa_id) # get domain assignments with indicated taxa_id (copied from protein, indexed)
         domain_ids = domain_assignments.values_list('domain_id', flat=True) # get domain ids from domain assignments
         return Domain.objects.filter(id__in=domain_ids) 
 
+    # SerializerForDomainByTaxa records, pfam_id is None for a domain without pfam
+    def represent(self, rows):
+        return [
+            {'id': id, 'pfam_id': None if domain_id is None else {'domain_id': domain_id, 'domain_description': domain_description}}
+            for id, domain_id, domain_description in rows
+        ]
+
 # https://www.django-rest-framework.org/api-guide/views/#api-reference
-# https://docs.djangoproject.com/en/3.2/ref/models/instances/#django.db.models.Model.DoesNotExist
 # https://www.django-rest-framework.org/api-guide/responses/#response
-# https://docs.python.org/3/library/functions.html#sum
-# https://docs.python.org/3/tutorial/datastructures.html#list-comprehensions
-# https://docs.python.org/3/reference/expressions.html#binary-arithmetic-operations
-# handles view for Coverage
-class CoverageView(APIView):
+# handles view for Coverage, stored in ProteinCoverage (see coverage.py): 'coverage' counts overlapping domains once,
+# 'raw_coverage' is the plain sum of domain lengths divided by the protein length
+class CoverageView(ConditionalGetMixin, APIView):
+    lookup_model = Protein # ETag from the data version and the protein
+    lookup_field = 'protein_id'
+
     def get(self, request, protein_id):
-        try:
-            protein = Protein.objects.get(protein_id=protein_id) # get protein with indicated protein_id
-        except Protein.DoesNotExist:
+        return self.conditional(self.coverage)(request, protein_id=protein_id)
+
+    def coverage(self, request, protein_id):
+        coverage = stored_protein_coverage(protein_id) # primary key lookup, no model instances
+        if coverage is None:
             return Response({'error': 'Protein was not found.'}, status=404) # if the protein does not exist, return an error response
+        return Response(coverage) # return response
+
+# https://www.django-rest-framework.org/api-guide/requests/#data
+# https://docs.djangoproject.com/en/4.2/ref/request-response/#streaminghttpresponse-objects
+# handles view for Coverage of many proteins, POST {"protein_ids": [...]} or {"taxa_id": 123}.
+# Coverage of all proteins is read from the stored rows the coverage view reads (protein_ids are sent COVERAGE_BATCH_SIZE
+# at a time, proteins without a row are computed and stored first) and the JSON response is streamed in chunks: {"results": [{"protein_id", "length", "coverage", "raw_coverage"}, ...], "missing": [...]}
+class BatchCoverageView(APIView):
+    COVERAGE_BATCH_SIZE = 500 # protein_ids per query (SQLite limits the number of query parameters)
+    MAX_PROTEIN_IDS = 100000 # largest accepted list of protein_ids
+    CHUNK_SIZE = 1000 # results per streamed chunk
+
+    def post(self, request):
+        if not isinstance(request.data, dict): # a JSON list or string has no protein_ids or taxa_id
+            return Response({'error': 'Send either protein_ids or taxa_id.'}, status=400)
+        protein_ids = request.data.get('protein_ids')
+        taxa_id = request.data.get('taxa_id')
+        if (protein_ids is None) == (taxa_id is None): # exactly one of them is needed
+            return Response({'error': 'Send either protein_ids or taxa_id.'}, status=400)
+        if taxa_id is not None:
+            if isinstance(taxa_id, bool) or not isinstance(taxa_id, int):
+                return Response({'error': 'taxa_id must be an integer.'}, status=400)
+            rows = stored_coverage_rows(Protein.objects.filter(taxa_id=taxa_id))
+            protein_ids = []
+        else:
+            if not isinstance(protein_ids, list) or not all(isinstance(protein_id, str) for protein_id in protein_ids):
+                return Response({'error': 'protein_ids must be a list of protein IDs.'}, status=400)
+            if len(protein_ids) > self.MAX_PROTEIN_IDS:
+                return Response({'error': f'At most {self.MAX_PROTEIN_IDS} protein_ids can be sent at once.'}, status=400)
+            protein_ids = sorted(set(protein_ids)) # batches in protein_id order give results in protein_id order
+            rows = self.rows_for_protein_ids(protein_ids)
+        return StreamingHttpResponse(self.stream(rows, protein_ids), content_type='application/json')
 
-        domain_assignments = DomainAssignment.objects.filter(protein=protein) # get domain assignments for protein
-        sum_of_domain_length = sum([assignment.end - assignment.start + 1 for assignment in domain_assignments]) # calculate the total length of all domains assigned to the protein
-        coverage = sum_of_domain_length / protein.length # calculate coverage (ratio of total domain length/protein length)
-        return Response({'coverage': coverage}) # return response
-
-# sets limit on how many records are displayed for http://127.0.0.1:8000/api/protein/
-# references: https://www.django-rest-framework.org/api-guide/pagination/
-# https://www.django-rest-framework.org/api-guide/pagination/#limitoffsetpagination
-# https://docs.djangoproject.com/en/4.1/ref/models/querysets/
-# https://www.django-rest-framework.org/api-guide/views/
-# https://www.django-rest-framework.org/api-guide/generic-views/
-# handles limiting records on Protein page, this helps it load faster. There is is list of page on the page so all records can be viewed (there are a lot of them)
-class LimitRecords(LimitOffsetPagination):
-    default_limit = 1 # use default variable to set 1 record as limit 
+    # stored rows of all protein_ids, batch by batch
+    def rows_for_protein_ids(self, protein_ids):
+        for start in range(0, len(protein_ids), self.COVERAGE_BATCH_SIZE):
+            yield from stored_coverage_rows(Protein.objects.filter(protein_id__in=protein_ids[start:start + self.COVERAGE_BATCH_SIZE]))
+
+    # yields the JSON response CHUNK_SIZE results at a time, protein_ids which were not found are listed in "missing"
+    def stream(self, rows, protein_ids):
+        found = set()
+        chunk = []
+        separator = ''
+        yield '{"results": ['
+        for protein_id, length, coverage, raw_coverage in rows:
+            found.add(protein_id)
+            chunk.append(json.dumps({'protein_id': protein_id, 'length': length, 'coverage': coverage, 'raw_coverage': raw_coverage}))
+            if len(chunk) == self.CHUNK_SIZE:
+                yield separator + ', '.join(chunk)
+                separator = ', '
+                chunk = []
+        if chunk:
+            yield separator + ', '.join(chunk)
+        yield '], "missing": ' + json.dumps([protein_id for protein_id in protein_ids if protein_id not in found]) + '}'
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#select-related
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#prefetch-objects
+# proteins with everything SerializerForProtein reads: organism is joined and all domain assignments (with domain and pfam
+# joined) are fetched with one more query, so a protein is serialized with 2 queries whatever number of domains it has
+def proteins_for_serializer():
+    return Protein.objects.select_related('organism').prefetch_related(
+        Prefetch('domain_assignments', queryset=DomainAssignment.objects.select_related('domain__pfam')),
+    )
 
 # https://www.django-rest-framework.org/api-guide/generic-views/#listcreateapiview
 # https://www.django-rest-framework.org/api-guide/generic-views/#retrieveupdatedestroyapiview
@@ -70,23 +326,32 @@ class LimitRecords(LimitOffsetPagination):
 # https://www.django-rest-framework.org/api-guide/generic-views/#lookup-field
 # https://www.django-rest-framework.org/api-guide/serializers/#specifying-which-fields-to-include
 # handles view for create new protein 
-class CreateNewProteinView(generics.ListCreateAPIView):
-    queryset = Protein.objects.all() # get all proteins from DB
+class CreateNewProteinView(ConditionalGetMixin, TimedSerializerMixin, generics.ListCreateAPIView):
+    queryset = proteins_for_serializer() # get all proteins from DB (with organism and domains)
     serializer_class = SerializerForProtein # uses SerializerForProtein for serialization 
-    pagination_class = LimitRecords # uses custom pagination defined in LimitRecords class
+    pagination_class = ProteinListCursorPagination # pages in protein_id order
 
 # handles view for Protein by ID
-class RetrieveProteinByIDView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Protein.objects.all() # get proteins from DB
+class RetrieveProteinByIDView(ConditionalGetMixin, VersionedResponseCacheMixin, TimedSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = proteins_for_serializer() # get proteins from DB (with organism and domains)
     serializer_class = SerializerForProtein # uses SerializerForProtein for serialization 
     lookup_field = 'protein_id' # uses protein id field for getting a specified protein 
+    lookup_model = Protein # ETag and cache key from the data version and the protein
     fields = ['protein_id', 'sequence', 'taxonomy', 'length', 'domains', 'organism'] # fields to be displayed
 
+    # https://www.django-rest-framework.org/api-guide/generic-views/#save-and-deletion-hooks
+    # deleted protein invalidates cached responses
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            bump_data_version()
+
 # handles view for Pfam details
-class RetrievePfamDetailsView(generics.RetrieveAPIView):
+class RetrievePfamDetailsView(ConditionalGetMixin, VersionedResponseCacheMixin, TimedSerializerMixin, generics.RetrieveAPIView):
     queryset = Pfam.objects.all() # get Pfam domains from DB
     serializer_class = SerializerForPfam # uses SerializerForPfam for serialization
     lookup_field = 'domain_id' # uses domain_id for getting an indicated Pfam domain
+    lookup_model = Pfam # ETag and cache key from the data version and the pfam
 
 
 # END: I wrote the code based on documentation and references. Important links were included in the comments next to each function. 
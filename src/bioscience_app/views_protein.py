@@ -5,7 +5,9 @@ from django.core.exceptions import ValidationError
 from .models import Protein, Organism, Domain, Pfam
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from .forms import NewProteinForm, FormSetForDomainAssignment
+from .forms import NewProteinForm, FormSetForDomainAssignment, DUPLICATE_PROTEIN
+from .caching import bump_data_version
+from django.db import transaction
 
 
 # START: I wrote the code based on documentation and references. Important links were included in the comments next to each function. 
@@ -25,7 +27,9 @@ def new_protein_form_page(request):
         form = NewProteinForm(request.POST) # create new variable and add data from POST request
         if form.is_valid(): # validate form
             protein = form.save(commit=False) # save form without commit
-            protein.save() # save protein to DB
+            with transaction.atomic():
+                protein.save() # save protein to DB
+                bump_data_version() # lists of the API change (new ETag)
             messages.success(request, 'Protein created successfully!') # show success message
             # refresh the page with blank fields
             return render(request, 'bioscience_app/create_new_protein.html', {'form': NewProteinForm(), 'success': True})
@@ -35,7 +39,10 @@ def new_protein_form_page(request):
     else:
         # if not POST request, create an empty form
         form = NewProteinForm()
-    return render(request, 'bioscience_app/create_new_protein.html', {'form': form})
+    response = render(request, 'bioscience_app/create_new_protein.html', {'form': form})
+    # tells BadRequestMiddleware to answer with 400 (the form is shown again with the error)
+    response.duplicate_protein = form.is_bound and form.has_error('protein_id', code=DUPLICATE_PROTEIN)
+    return response
 
 #  https://www.django-rest-framework.org/api-guide/exceptions/#validationerror
 # handles data validation 
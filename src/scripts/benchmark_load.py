@@ -0,0 +1,219 @@
+import sys # allows to work with Python Sys
+import os # allows to work with OS
+import csv # allows to write synthetic CSV files
+import json # allows to save machine-readable results
+import time # allows to measure loading speed
+import random # allows to generate synthetic data
+import argparse # allows to work with command line arguments
+import tempfile # allows to create a scratch directory
+import resource # allows to read peak memory usage
+import platform # allows to record the platform of a run
+import cProfile # allows to profile the loader
+import io # allows to capture the output of the loader
+import contextlib # allows to capture the output of the loader
+import pstats # allows to read profiler results
+from datetime import datetime, timezone # allows to timestamp results
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# Benchmark for scripts/load_data.py: generates synthetic assignment files shaped like data_files/assignment_data_set.csv,
+# loads them into a scratch database and reports rows/s, peak RSS, number of queries and the top functions of cProfile.
+#
+#   python scripts/benchmark_load.py --rows 10000 100000 1000000 --mode bulk --output benchmark_results.json
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__))) # add the directory of file to system path
+if __name__ == '__main__' and 'BIOSCIENCE_DB_NAME' not in os.environ: # never benchmark against the real database
+    os.environ['BIOSCIENCE_DB_NAME'] = os.path.join(tempfile.mkdtemp(prefix='bioscience_benchmark_'), 'db.sqlite3')
+
+import load_data # sets up Django
+from generate_data import clear_tables
+import django
+from django.core.management import call_command
+from django.db import connection
+from bioscience_app.models import Protein, DomainAssignment
+
+CLADES = ['E', 'B', 'A', 'V'] # clades used in the data set
+LOADERS = { # loading modes which can be benchmarked
+    'row': load_data.load_assignment_data_set,
+    'bulk': load_data.load_assignment_data_set_bulk,
+    'delta': load_data.load_assignment_data_set_delta,
+}
+
+# https://docs.python.org/3/library/random.html
+# https://docs.python.org/3/library/csv.html#csv.writer
+# writes a synthetic assignment file with the given number of rows: 1-4 domains per protein, about 5 proteins per
+# organism and one pfam per 4 rows (at most 20000), the same seed always gives the same file
+def generate_assignment_file(path, rows, seed=0):
+    generator = random.Random(seed)
+    organisms = max(rows // 10, 1)
+    pfams = min(max(rows // 4, 1), 20000)
+    written = 0
+    protein_number = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        while written < rows:
+            protein_number += 1
+            protein_id = f"SYN{protein_number:09d}"
+            organism = generator.randrange(organisms)
+            length = generator.randint(50, 2000)
+            for _ in range(min(generator.randint(1, 4), rows - written)):
+                pfam = generator.randrange(pfams)
+                start = generator.randint(1, length - 10)
+                writer.writerow([
+                    protein_id,
+                    100000 + organism, # taxa_id
+                    CLADES[organism % len(CLADES)],
+                    f"Genus{organism} species{organism}",
+                    f"Synthetic domain family {pfam}",
+                    f"PF{pfam:05d}",
+                    start,
+                    generator.randint(start + 1, length),
+                    length,
+                ])
+                written += 1
+    return path
+
+# https://docs.djangoproject.com/en/4.2/topics/db/instrumentation/
+# counts queries sent to the database
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+# https://docs.python.org/3/library/resource.html#resource.getrusage
+# peak resident memory of this process and its (worker) children in MB
+def peak_rss_mb():
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024 # ru_maxrss is in bytes on macOS, in KB on Linux
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(usage / scale, 1)
+
+# https://docs.python.org/3/library/profile.html#pstats.Stats
+# returns the top functions of a profile sorted by cumulative time
+def profile_top(profiler, top):
+    stats = pstats.Stats(profiler)
+    stats.sort_stats('cumulative')
+    result = []
+    for function in stats.fcn_list[:top]:
+        primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[function]
+        file_name, line, name = function
+        result.append({
+            'function': f"{file_name}:{line}({name})",
+            'calls': calls,
+            'tottime': round(total_time, 4),
+            'cumtime': round(cumulative_time, 4),
+        })
+    return result
+
+# https://docs.python.org/3/library/csv.html#csv.reader
+# numbers of distinct proteins and distinct domain assignments (protein, pfam, start, end) of an assignment file,
+# what a complete load has to leave in the database
+def expected_counts(path):
+    proteins, assignments = set(), set()
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            proteins.add(row[0])
+            assignments.add((row[0], row[5], row[6], row[7]))
+    return len(proteins), len(assignments)
+
+# empties the database (and the manifest of the delta loader, so every delta run loads the whole file)
+def reset_load(path, mode):
+    clear_tables() # removes all rows loaded by a previous run
+    if mode == 'delta':
+        load_data.Manifest(path).clear()
+
+# https://docs.python.org/3/library/contextlib.html#contextlib.redirect_stdout
+# runs loader, the loaders print errors instead of raising them, so a printed "Error:" makes the run fail
+def run_loader(loader, path, chunk_size, options):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        loader(path, chunk_size, **options)
+    print(output.getvalue(), end='')
+    errors = [line for line in output.getvalue().splitlines() if line.startswith('Error:')]
+    if errors:
+        raise RuntimeError(f"Load of '{path}' failed: {errors[0]}")
+
+# fails if the database does not have every protein and domain assignment of the file
+def check_loaded(path):
+    expected = expected_counts(path)
+    loaded = (Protein.objects.count(), DomainAssignment.objects.count())
+    if loaded != expected:
+        raise RuntimeError(f"Load of '{path}' is incomplete: {loaded[0]} of {expected[0]} proteins, {loaded[1]} of {expected[1]} domain assignments.")
+    return loaded
+
+# loads the file once and returns its measurements, with profile_top > 0 the load is repeated under cProfile.
+# Both runs start from an empty database and fail (RuntimeError) unless the whole file was loaded.
+def measure_load(path, rows, mode='bulk', chunk_size=5000, workers=1, profile_top_n=20):
+    loader = LOADERS[mode]
+    options = {'progress': False} if mode == 'delta' else {'progress': False, 'workers': workers}
+    reset_load(path, mode)
+    counter = QueryCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        run_loader(loader, path, chunk_size, options)
+    seconds = time.perf_counter() - started
+    proteins, domain_assignments = check_loaded(path)
+    result = {
+        'rows': rows,
+        'mode': mode,
+        'chunk_size': chunk_size,
+        'workers': workers,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows / seconds, 1),
+        'peak_rss_mb': peak_rss_mb(),
+        'queries': counter.count,
+        'proteins': proteins,
+        'domain_assignments': domain_assignments,
+    }
+    if profile_top_n:
+        reset_load(path, mode)
+        profiler = cProfile.Profile()
+        profiler.runcall(run_loader, loader, path, chunk_size, options)
+        check_loaded(path)
+        result['profile'] = profile_top(profiler, profile_top_n)
+    return result
+
+# https://docs.python.org/3/library/argparse.html
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scripts/load_data.py with synthetic assignment files.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000], help="sizes of the synthetic files")
+    parser.add_argument('--mode', choices=sorted(LOADERS), default='bulk', help="loader to benchmark")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="rows per batch")
+    parser.add_argument('--workers', type=int, default=1, help="parser processes")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic data")
+    parser.add_argument('--profile-top', type=int, default=20, help="number of cProfile entries to report (0 disables profiling)")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file for the results")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+    call_command('migrate', verbosity=0) # create tables of the scratch database
+    directory = tempfile.mkdtemp(prefix='bioscience_benchmark_files_')
+    results = []
+    for rows in sorted(arguments.rows): # smallest first, peak RSS is a high-water mark of the process
+        path = generate_assignment_file(os.path.join(directory, f"assignment_{rows}.csv"), rows, arguments.seed)
+        result = measure_load(path, rows, arguments.mode, arguments.chunk_size, arguments.workers, arguments.profile_top)
+        results.append(result)
+        print(f"{rows:>9} rows: {result['seconds']:>8.2f} s, {result['rows_per_sec']:>9.0f} rows/s, {result['peak_rss_mb']:>7.1f} MB peak RSS, {result['queries']:>7} queries")
+        for entry in result.get('profile', [])[:10]:
+            print(f"    {entry['cumtime']:>8.3f} s  {entry['function']}")
+
+    with open(arguments.output, 'w') as f:
+        json.dump({
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'database': connection.settings_dict['NAME'],
+            'results': results,
+        }, f, indent=2)
+    print(f"Results saved to '{arguments.output}'.")
+
+if __name__ == '__main__':
+    main()
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
@@ -0,0 +1,115 @@
+import sys # allows to work with Python Sys
+import os # allows to work with OS
+import json # allows to save machine-readable results
+import random # allows to generate synthetic data
+import timeit # allows to time the renderers
+import argparse # allows to work with command line arguments
+import platform # allows to record the platform of a run
+from datetime import datetime, timezone # allows to timestamp results
+
+import django # allows to work with Django
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# Benchmark of the JSON renderers for SerializerForProtein responses: the same serializer output (synthetic proteins
+# with 1 to 100 domains, built in memory so no database is needed) is rendered by DRF's JSONRenderer and by
+# FastJSONRenderer, the best time of several runs, the speedup and whether both produced the same bytes are reported.
+#
+#   python scripts/benchmark_renderer.py --proteins 1 100 --domains 1 10 100 --output renderer_results.json
+
+# https://docs.djangoproject.com/en/4.2/topics/settings/#calling-django-setup-is-required-for-standalone-django-usage
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/..") # add the directory of parent file directory to system path
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bioscience.settings") # set the default environment
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer
+from bioscience_app.renderers import FastJSONRenderer, orjson
+from bioscience_app.models import Protein, Organism, Domain, Pfam, DomainAssignment # django models
+from bioscience_app.serializers import SerializerForProtein
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#prefetch-related
+# unsaved proteins with organism and domains, domains are put in the prefetch cache so the serializer reads no database
+def synthetic_proteins(proteins, domains, seed=0):
+    generator = random.Random(seed)
+    organism = Organism(id=1, taxa_id=53326, clade='E', genus='Ancylostoma', species='ceylanicum')
+    result = []
+    for number in range(proteins):
+        length = generator.randint(200, 2000)
+        protein = Protein(protein_id=f"SYN{number:09d}", sequence=''.join(generator.choices(AMINO_ACIDS, k=length)), length=length, organism=organism)
+        assignments = []
+        for position in range(domains):
+            pfam = Pfam(domain_id=f"PF{generator.randrange(20000):05d}", domain_description=f"Synthetic domain family {position}")
+            domain = Domain(id=position + 1, domain_description=pfam.domain_description, pfam=pfam)
+            start = generator.randint(1, length - 10)
+            assignments.append(DomainAssignment(id=position + 1, protein=protein, domain=domain, start=start, end=generator.randint(start + 1, length)))
+        protein._prefetched_objects_cache = {'domain_assignments': assignments}
+        result.append(protein)
+    return result
+
+# https://docs.python.org/3/library/timeit.html#timeit.Timer.repeat
+# best time of one call of function in milliseconds
+def best_ms(function, repeat, number):
+    return min(timeit.repeat(function, repeat=repeat, number=number)) / number * 1000
+
+# serializes the proteins once and times the serializer and both renderers
+def measure(proteins, domains, repeat=5):
+    instances = synthetic_proteins(proteins, domains)
+    serialize = lambda: SerializerForProtein(instances, many=True).data if proteins > 1 else SerializerForProtein(instances[0]).data
+    data = serialize()
+    slow, fast = JSONRenderer(), FastJSONRenderer()
+    number = max(1, 2000 // (proteins * domains)) # calls per timing, small responses are timed over many calls
+    json_ms = best_ms(lambda: slow.render(data), repeat, number)
+    fast_ms = best_ms(lambda: fast.render(data), repeat, number)
+    return {
+        'proteins': proteins,
+        'domains_per_protein': domains,
+        'bytes': len(slow.render(data)),
+        'serializer_ms': round(best_ms(serialize, repeat, max(1, number // 10)), 4),
+        'json_renderer_ms': round(json_ms, 4),
+        'fast_renderer_ms': round(fast_ms, 4),
+        'speedup': round(json_ms / fast_ms, 2),
+        'identical': slow.render(data) == fast.render(data),
+    }
+
+# https://docs.python.org/3/library/argparse.html
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Compare JSONRenderer and FastJSONRenderer on SerializerForProtein responses.")
+    parser.add_argument('--proteins', type=int, nargs='+', default=[1, 100], help="proteins per response")
+    parser.add_argument('--domains', type=int, nargs='+', default=[1, 10, 100], help="domains per protein")
+    parser.add_argument('--repeat', type=int, default=5, help="timings per measurement (the best is reported)")
+    parser.add_argument('--output', default='renderer_results.json', help="JSON file for the results")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+    if orjson is None:
+        print("orjson is not installed, FastJSONRenderer falls back to JSONRenderer.")
+    results = []
+    for proteins in arguments.proteins:
+        for domains in arguments.domains:
+            result = measure(proteins, domains, arguments.repeat)
+            results.append(result)
+            print(f"{proteins:>5} proteins x {domains:>3} domains ({result['bytes']:>9} bytes): serializer {result['serializer_ms']:>9.3f} ms, "
+                  f"JSONRenderer {result['json_renderer_ms']:>8.3f} ms, FastJSONRenderer {result['fast_renderer_ms']:>8.3f} ms, "
+                  f"{result['speedup']:>5.1f}x{'' if result['identical'] else ', output differs'}")
+
+    with open(arguments.output, 'w') as f:
+        json.dump({
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'orjson': orjson.__version__ if orjson else None,
+            'platform': platform.platform(),
+            'results': results,
+        }, f, indent=2)
+    print(f"Results saved to '{arguments.output}'.")
+
+if __name__ == '__main__':
+    main()
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
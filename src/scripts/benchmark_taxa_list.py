@@ -0,0 +1,113 @@
+import sys # allows to work with Python Sys
+import os # allows to work with OS
+import json # allows to save machine-readable results
+import timeit # allows to time the read paths
+import argparse # allows to work with command line arguments
+import tempfile # allows to create a scratch directory
+import platform # allows to record the platform of a run
+from datetime import datetime, timezone # allows to timestamp results
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# Benchmark of the by-taxa lists: one taxa with --rows proteins (one domain each) is created in a scratch database and
+# all its records are read the way the views did before (model instances and SerializerForProteinByTaxa /
+# SerializerForDomainByTaxa) and with the values_list() projection of ListProteinByTaxaView / ListDomainByTaxaView.
+# The best time of several runs, the speedup and whether both gave the same records are reported.
+#
+#   python scripts/benchmark_taxa_list.py --rows 1000 100000 --output taxa_list_results.json
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__))) # add the directory of file to system path
+if __name__ == '__main__' and 'BIOSCIENCE_DB_NAME' not in os.environ: # never benchmark against the real database
+    os.environ['BIOSCIENCE_DB_NAME'] = os.path.join(tempfile.mkdtemp(prefix='bioscience_benchmark_'), 'db.sqlite3')
+
+import load_data # sets up Django
+from generate_data import clear_tables
+import django
+from django.core.management import call_command
+from bioscience_app.models import Organism, Protein, Pfam, Domain, DomainAssignment # django models
+from bioscience_app.serializers import SerializerForProteinByTaxa, SerializerForDomainByTaxa
+from bioscience_app.views_api import ListProteinByTaxaView, ListDomainByTaxaView
+
+TAXA_ID = 865 # taxa of the benchmark
+BATCH_SIZE = 5000 # rows per bulk_create
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#bulk-create
+# replaces the database with one taxa of rows proteins, every protein has one domain (with its own pfam)
+def create_taxa(rows):
+    clear_tables()
+    organism = Organism.objects.create(taxa_id=TAXA_ID, clade='E', genus='Genus', species='species')
+    Pfam.objects.bulk_create((Pfam(domain_id=f"PF{number:06d}", domain_description=f"Synthetic domain family {number}") for number in range(rows)), batch_size=BATCH_SIZE)
+    Domain.objects.bulk_create((Domain(domain_description=f"Synthetic domain family {number}", pfam_id=f"PF{number:06d}") for number in range(rows)), batch_size=BATCH_SIZE)
+    Protein.objects.bulk_create((Protein(protein_id=f"SYN{number:09d}", sequence='M' * 100, length=100, organism=organism, id_custom=number, taxa_id=TAXA_ID) for number in range(rows)), batch_size=BATCH_SIZE)
+    domain_ids = Domain.objects.order_by('id').values_list('id', flat=True)
+    DomainAssignment.objects.bulk_create((DomainAssignment(protein_id=f"SYN{number:09d}", domain_id=domain_id, start=1, end=50, taxa_id=TAXA_ID) for number, domain_id in enumerate(domain_ids)), batch_size=BATCH_SIZE)
+
+# https://docs.python.org/3/library/timeit.html#timeit.Timer.repeat
+# best time of one call of function in milliseconds
+def best_ms(function, repeat):
+    return min(timeit.repeat(function, repeat=repeat, number=1)) * 1000
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#select-related
+# reads all records of the taxa both ways, the serializer path gets pfams joined (the view used to read them one query
+# per domain, which is slower still)
+def measure(rows, repeat=3):
+    create_taxa(rows)
+    paths = {}
+    protein_view = ListProteinByTaxaView(kwargs={'taxa_id': TAXA_ID}, request=None, format_kwarg=None)
+    paths['proteins'] = (
+        lambda: SerializerForProteinByTaxa(protein_view.get_queryset().only('protein_id', 'id_custom').order_by('protein_id'), many=True).data,
+        lambda: protein_view.represent(protein_view.get_queryset().values_list(*protein_view.projection).order_by('protein_id')),
+    )
+    domain_view = ListDomainByTaxaView(kwargs={'taxa_id': TAXA_ID}, request=None, format_kwarg=None)
+    paths['domains'] = (
+        lambda: SerializerForDomainByTaxa(domain_view.get_queryset().select_related('pfam').order_by('id'), many=True).data,
+        lambda: domain_view.represent(domain_view.get_queryset().values_list(*domain_view.projection).order_by('id')),
+    )
+    results = []
+    for name, (serializer_path, projected_path) in paths.items():
+        serializer_ms = best_ms(serializer_path, repeat)
+        projected_ms = best_ms(projected_path, repeat)
+        results.append({
+            'list': name,
+            'rows': rows,
+            'serializer_ms': round(serializer_ms, 2),
+            'projected_ms': round(projected_ms, 2),
+            'speedup': round(serializer_ms / projected_ms, 2),
+            'identical': json.loads(json.dumps(serializer_path())) == projected_path(),
+        })
+    return results
+
+# https://docs.python.org/3/library/argparse.html
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the serializer and values_list() read paths of the by-taxa lists.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000], help="proteins (and domains) of the taxa")
+    parser.add_argument('--repeat', type=int, default=3, help="timings per measurement (the best is reported)")
+    parser.add_argument('--output', default='taxa_list_results.json', help="JSON file for the results")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+    call_command('migrate', verbosity=0) # create tables of the scratch database
+    results = []
+    for rows in arguments.rows:
+        for result in measure(rows, arguments.repeat):
+            results.append(result)
+            print(f"{result['list']:>8} {rows:>8} rows: serializer {result['serializer_ms']:>9.1f} ms, values_list {result['projected_ms']:>8.1f} ms, "
+                  f"{result['speedup']:>5.1f}x{'' if result['identical'] else ', records differ'}")
+
+    with open(arguments.output, 'w') as f:
+        json.dump({
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }, f, indent=2)
+    print(f"Results saved to '{arguments.output}'.")
+
+if __name__ == '__main__':
+    main()
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
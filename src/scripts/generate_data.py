@@ -0,0 +1,183 @@
+import sys # allows to work with Python Sys
+import os # allows to work with OS
+import time # allows to measure generation speed
+import argparse # allows to work with command line arguments
+import numpy as np # allows to generate random data in arrays instead of one object at a time
+
+import django # allows to work with Django
+
+# START: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
+
+# Synthetic database generator for load and performance testing. All values of a chunk of proteins (organisms, lengths,
+# residues, domain boundaries) are drawn as NumPy arrays and written to the five tables with one executemany per table.
+#
+#   BIOSCIENCE_DB_NAME=/tmp/synthetic.sqlite3 python scripts/generate_data.py --proteins 1000000 --seed 0
+#
+# A database which already has data is only emptied with --replace.
+
+# https://docs.python.org/3/library/sys.html#sys.path
+# https://docs.djangoproject.com/en/4.2/topics/settings/#calling-django-setup-is-required-for-standalone-django-usage
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__))) # add the directory of file to system path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/..") # add the directory of parent file directory to system path
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bioscience.settings") # set the default environment
+
+django.setup()
+
+from bioscience_app.models import Protein, Domain, Organism, DomainAssignment, Pfam, ProteinCoverage # django models
+from bioscience_app.coverage import rebuild_coverage # stored coverage of the generated proteins
+from bioscience_app.caching import bump_data_version # cached API responses are invalidated
+from django.db import transaction, connection # allows to write each chunk in a single transaction
+from django.utils import timezone # last_modified of the generated rows
+
+# https://web.expasy.org/docs/relnotes/relstat.html
+# amino acids and their frequency in UniProtKB/Swiss-Prot (normalised to 1 below)
+AMINO_ACIDS = np.frombuffer(b"ARNDCQEGHILKMFPSTWYV", dtype=np.uint8)
+AMINO_ACID_FREQUENCIES = np.array([8.25, 5.53, 4.06, 5.45, 1.37, 3.93, 6.75, 7.07, 2.27, 5.96,
+                                   9.66, 5.84, 2.42, 3.86, 4.70, 6.56, 5.34, 1.08, 2.92, 6.87])
+AMINO_ACID_FREQUENCIES = AMINO_ACID_FREQUENCIES / AMINO_ACID_FREQUENCIES.sum()
+CLADES = np.array(['E', 'B', 'A', 'V']) # clades used in the data set
+ID_CUSTOM_START = 80000 # first id_custom given by scripts/load_data.py
+
+# https://numpy.org/doc/stable/reference/random/generator.html#numpy.random.Generator.choice
+# probabilities of picking each of n items, skew 0 is uniform and larger values make the first items more popular (Zipf-like)
+def popularity(n, skew):
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+# https://docs.djangoproject.com/en/4.2/topics/db/sql/#executing-custom-sql-directly
+# inserts rows (tuples in the order of columns) into the table of a model with a single executemany
+def insert_rows(model, columns, rows):
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ", ".join(connection.ops.quote_name(column) for column in columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+    with connection.cursor() as cursor:
+        cursor.executemany(f"INSERT INTO {table} ({names}) VALUES ({placeholders})", rows)
+
+# removes every row of the five tables (and stored coverage) without loading them into Python (no cascades or
+# signals are needed, all tables are emptied), cached API responses are invalidated
+def clear_tables():
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in (ProteinCoverage, DomainAssignment, Domain, Pfam, Protein, Organism):
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+        bump_data_version()
+
+# writes organisms 1..n with taxa_id 100000 + n, clades are random
+def generate_organisms(rng, organisms):
+    clades = CLADES[rng.integers(0, len(CLADES), size=organisms)]
+    rows = [(number + 1, 100000 + number, str(clades[number]), f"Genus{number}", f"species{number}") for number in range(organisms)]
+    insert_rows(Organism, ['id', 'taxa_id', 'clade', 'genus', 'species'], rows)
+
+# writes pfams PF00000.. and one domain per pfam (domain n + 1 belongs to pfam n), like the loaders do
+def generate_pfams(pfams):
+    now = timezone.now()
+    insert_rows(Pfam, ['domain_id', 'domain_description', 'last_modified'], [(f"PF{number:05d}", f"Synthetic domain family {number}", now) for number in range(pfams)])
+    insert_rows(Domain, ['id', 'domain_description', 'pfam_id'], [(number + 1, f"Synthetic domain family {number}", f"PF{number:05d}") for number in range(pfams)])
+
+# https://numpy.org/doc/stable/reference/random/generator.html
+# https://numpy.org/doc/stable/reference/generated/numpy.repeat.html
+# writes proteins first..first + count - 1 with their sequences and domain assignments, returns number of assignments
+def generate_proteins(rng, first, count, options):
+    organisms = rng.choice(options['organisms'], size=count, p=options['organism_weights']) + 1 # organism ids start at 1
+    lengths = np.clip(rng.lognormal(np.log(options['length_mean']), options['length_sigma'], size=count),
+                      options['min_length'], options['max_length']).astype(np.int64)
+
+    # all residues of the chunk are drawn at once and cut into sequences at the cumulative lengths
+    residues = AMINO_ACIDS[rng.choice(len(AMINO_ACIDS), size=int(lengths.sum()), p=AMINO_ACID_FREQUENCIES)].tobytes().decode('ascii')
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    taxa_ids = organisms + 99999 # organism n has taxa_id 100000 + n - 1 (see generate_organisms)
+    now = timezone.now()
+    proteins = [(f"SYN{first + number:09d}", residues[starts[number]:ends[number]], int(lengths[number]),
+                 int(organisms[number]), ID_CUSTOM_START + first + number, int(taxa_ids[number]), now) for number in range(count)]
+    insert_rows(Protein, ['protein_id', 'sequence', 'length', 'organism_id', 'id_custom', 'taxa_id', 'last_modified'], proteins)
+
+    # every protein gets 1..max_domains domains, domain i lies inside the i-th of equal segments of the protein
+    # so boundaries never repeat within a protein
+    domains = np.clip(rng.poisson(options['domains_mean'], size=count), 1, options['max_domains'])
+    domains = np.minimum(domains, np.maximum(lengths // 10, 1))
+    protein_of = np.repeat(np.arange(count), domains)
+    position = np.arange(len(protein_of)) - np.repeat(np.cumsum(domains) - domains, domains)
+    width = lengths[protein_of] // domains[protein_of]
+    segment_start = position * width
+    domain_start = segment_start + 1 + rng.integers(0, width // 2, endpoint=True)
+    domain_end = rng.integers(np.minimum(domain_start + 1, segment_start + width), segment_start + width, endpoint=True)
+    pfams = rng.choice(options['pfams'], size=len(protein_of), p=options['pfam_weights']) + 1 # domain ids start at 1
+    assignments = [(f"SYN{first + protein:09d}", int(domain), int(start), int(end), int(taxa_id))
+                   for protein, domain, start, end, taxa_id in zip(protein_of, pfams, domain_start, domain_end, taxa_ids[protein_of])]
+    insert_rows(DomainAssignment, ['protein_id', 'domain_id', 'start', 'end', 'taxa_id'], assignments)
+    return len(assignments)
+
+# true when any of the generated tables has rows
+def database_has_data():
+    return any(model.objects.exists() for model in (Organism, Pfam, Domain, Protein, DomainAssignment))
+
+# https://numpy.org/doc/stable/reference/random/generator.html#numpy.random.default_rng
+# writes a synthetic database, the same arguments (chunk_size included, values are drawn chunk by chunk) and seed always
+# give the same database. A database with data is only emptied first with replace, otherwise nothing is written and
+# None is returned
+def generate_database(proteins, seed=0, organisms=None, pfams=None, length_mean=350, length_sigma=0.6, min_length=30,
+                      max_length=35000, domains_mean=1.5, max_domains=12, organism_skew=1.0, pfam_skew=1.0,
+                      chunk_size=50000, progress=True, replace=False):
+    if not replace and database_has_data():
+        print("Error: the database already has data, use --replace to delete it and generate a new data set.")
+        return None
+    rng = np.random.default_rng(seed)
+    organisms = organisms or max(proteins // 5, 1) # about 5 proteins per organism
+    pfams = pfams or min(max(proteins // 10, 1), 20000) # about as many families as Pfam has
+    options = {
+        'organisms': organisms, 'organism_weights': popularity(organisms, organism_skew),
+        'pfams': pfams, 'pfam_weights': popularity(pfams, pfam_skew),
+        'length_mean': length_mean, 'length_sigma': length_sigma, 'min_length': min_length, 'max_length': max_length,
+        'domains_mean': domains_mean, 'max_domains': max_domains,
+    }
+    started = time.perf_counter()
+    clear_tables()
+    with transaction.atomic():
+        generate_organisms(rng, organisms)
+        generate_pfams(pfams)
+    assignments = 0
+    for first in range(0, proteins, chunk_size):
+        with transaction.atomic(): # one transaction per chunk
+            assignments += generate_proteins(rng, first, min(chunk_size, proteins - first), options)
+        if progress:
+            done = min(first + chunk_size, proteins)
+            print(f"{done} proteins ({done / (time.perf_counter() - started):.0f} proteins/s)")
+    rebuild_coverage()
+    bump_data_version()
+    return {'organisms': organisms, 'pfams': pfams, 'proteins': proteins, 'domain_assignments': assignments}
+
+# https://docs.python.org/3/library/argparse.html
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Fill the database (set BIOSCIENCE_DB_NAME for a scratch one) with a synthetic data set.")
+    parser.add_argument('--proteins', type=int, default=100000, help="number of proteins")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the random generator")
+    parser.add_argument('--organisms', type=int, help="number of organisms (default proteins / 5)")
+    parser.add_argument('--pfams', type=int, help="number of pfam families (default proteins / 10, at most 20000)")
+    parser.add_argument('--length-mean', type=float, default=350, help="median protein length (lengths are log-normal)")
+    parser.add_argument('--length-sigma', type=float, default=0.6, help="spread of the log-normal protein lengths")
+    parser.add_argument('--domains-mean', type=float, default=1.5, help="mean number of domains per protein (Poisson, at least 1)")
+    parser.add_argument('--organism-skew', type=float, default=1.0, help="Zipf exponent of proteins per organism (0 is uniform)")
+    parser.add_argument('--pfam-skew', type=float, default=1.0, help="Zipf exponent of domains per pfam (0 is uniform)")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="proteins written per transaction (the same seed gives the same data for the same chunk size)")
+    parser.add_argument('--replace', action='store_true', help="delete the data of a database which is not empty")
+    parser.add_argument('--quiet', action='store_true', help="do not print progress")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+    counts = generate_database(arguments.proteins, arguments.seed, arguments.organisms, arguments.pfams,
+                               length_mean=arguments.length_mean, length_sigma=arguments.length_sigma,
+                               domains_mean=arguments.domains_mean, organism_skew=arguments.organism_skew,
+                               pfam_skew=arguments.pfam_skew, chunk_size=arguments.chunk_size, progress=not arguments.quiet,
+                               replace=arguments.replace)
+    if counts is None:
+        return
+    print(f"Generated {counts['organisms']} organisms, {counts['pfams']} pfams, {counts['proteins']} proteins and {counts['domain_assignments']} domain assignments.")
+
+if __name__ == '__main__':
+    main()
+
+# END: I wrote the code based on documentation and references. Important links were included in the comments next to each function.
+# Please review links below and short commentary in readme.txt. Thank you.
@@ -1,6 +1,7 @@
 import sys # allows to work with Python Sys 
 import os # allows to work with OS 
-import csv # allows to work with CSV documents
+import argparse # allows to work with command line arguments
+from collections import defaultdict # allows to group domains by pfam
 from django.core.wsgi import get_wsgi_application 
 
 import django # allows to work with Django
@@ -20,26 +21,39 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bioscience.settings") # set the
 django.setup()
 
 from bioscience_app.models import Protein, Domain, Organism, DomainAssignment, Pfam # django models 
+from django.db import transaction, connection # allows to commit each chunk in a single transaction
+from django.db.models import F, Min, Max, Window, Case, When, Value # allows to find duplicates with one query
+from django.utils import timezone # last_modified of rows written by bulk statements
+from load_pipeline import run_pipeline, parse_assignment_row, Checkpoint, Manifest, compute_record_hashes, diff_record_hashes # streaming reader shared by all loaders
+from load_pipeline import ProgressReporter, iter_fasta_batches, invalid_residues # streaming FASTA parser
+from bioscience_app.coverage import refresh_coverage # stored coverage of the written proteins
+from bioscience_app.signals import coverage_updates_paused # deletes of many rows refresh coverage once
+from bioscience_app.caching import bump_data_version # cached API responses are invalidated by every load
 
 application = get_wsgi_application() # assigning the WSGI to application 
 
-# https://docs.python.org/3/library/functions.html#open
-# https://docs.python.org/3/library/csv.html#csv.reader
 # https://docs.python.org/3/library/os.path.html
+# returns path of a file in "data_files" (absolute paths are returned unchanged)
+def data_file_path(file_path):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_files', file_path)
+
 # https://docs.djangoproject.com/en/3.2/ref/models/querysets/#get-or-create
 # https://docs.djangoproject.com/en/3.2/ref/models/instances/#django.db.models.Model.save
+# writer stage for "assignment_data_sequences.csv", saves one batch of rows
+def write_sequences(rows):
+    organism, _ = Organism.objects.get_or_create(genus="Unspecified", species="Unspecified", defaults={"taxa_id": -1}) # specifying default values for organism 
+    with coverage_updates_paused(): # coverage of the batch is refreshed once below
+        for protein_id, sequence in rows: # go through each row 
+            protein, _ = Protein.objects.get_or_create(protein_id=protein_id, defaults={"organism": organism}) # specifying default values for protein 
+            protein.sequence = sequence # setting sequence 
+            protein.save() # saving to DB
+    refresh_coverage(protein_id for protein_id, _ in rows)
+
 # https://docs.python.org/3/library/exceptions.html
 
-def load_assignment_data_sequences(file_path):
+def load_assignment_data_sequences(file_path, batch_size=5000, progress=True):
     try:
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_files', file_path), 'r') as f: # open the "assignment_data_sequences.csv"
-            csv_reader = csv.reader(f) # assign variable to create CSV reader
-            for row in csv_reader: # go through each row 
-                protein_id, sequence = row # assign variables into rows 
-                organism, _ = Organism.objects.get_or_create(genus="Unspecified", species="Unspecified", defaults={"taxa_id": -1}) # specifying default values for organism 
-                protein, _ = Protein.objects.get_or_create(protein_id=protein_id, defaults={"organism": organism}) # specifying default values for protein 
-                protein.sequence = sequence # setting sequence 
-                protein.save() # saving to DB
+        run_pipeline(data_file_path(file_path), write_sequences, batch_size=batch_size, progress=progress) # stream the "assignment_data_sequences.csv" in batches
     
     # error checking
     except FileNotFoundError: # if file is not found print an error
@@ -51,80 +65,168 @@ def load_assignment_data_sequences(file_path):
     except Exception as e: # if there is some other error, print the error message
         print(f"Error: Unexpected error! Check your code and file. {e}")
 
+    finally: # also after a failed load, some batches may be committed
+        bump_data_version() # cached API responses are rebuilt from the new data
 
-# https://docs.python.org/3/library/os.path.html
-# https://docs.python.org/3/library/csv.html
-# https://docs.python.org/3/library/functions.html#open
-# https://docs.python.org/3/library/os.path.html#os.path.abspath
-# https://docs.python.org/3/library/os.path.html#os.path.dirname
-# https://docs.python.org/3/library/os.path.html#os.path.join
-# https://docs.djangoproject.com/en/3.2/topics/db/models/
-# https://docs.python.org/3/library/exceptions.html
 
-def load_assignment_data_set(file_path):
-    try:
-        id_custom = 80000  # custom id to start at 80000 
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_files', file_path), 'r') as f: # open the "assignment_data_set.csv"
-            csv_reader = csv.reader(f) # assign variable to create CSV reader
-            for row in csv_reader: # go through each row 
-                protein_id = row[0] # from 1st column get protein_id 
-                taxa_id = int(row[1]) # from 2nd column get taxa_id 
-                clade = row[2] # from 3rd column get clade 
-                genus, species = row[3].split(" ")[:2] # from 4th column get genus and species names and separate them  
-                domain_description = row[4] # from 5th column get description 
-                domain_id_pfam = row[5] # from 6th column get pfam's domain_id 
-                start = int(row[6]) # from 7th column get start 
-                end = int(row[7]) # from 8th column get end
-                length_protein = int(row[8]) # from 9th column get length
-
-                organism, _ = Organism.objects.get_or_create( # organism instance with specified assigments 
-                    taxa_id=taxa_id,
-                    clade=clade,
-                    genus=genus,
-                    species=species,
-                )
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#bulk-create
+# https://docs.djangoproject.com/en/4.2/topics/db/sql/#executing-custom-sql-directly
+# writer stage for FASTA files: fills sequence and length of a batch of proteins, proteins which are not in the DB
+# yet are created for the "Unspecified" organism (same as load_assignment_data_sequences).
+# Records with an empty sequence or invalid residues are skipped.
+class FastaSequenceLoader:
+    def __init__(self):
+        self.organism, _ = Organism.objects.get_or_create(genus="Unspecified", species="Unspecified", defaults={"taxa_id": -1}) # specifying default values for organism 
+        self.skipped = 0 # number of invalid records
+
+    # saves one batch of FastaRecord objects in a single transaction
+    def load_chunk(self, records):
+        sequences = {}
+        for record in records:
+            residues = invalid_residues(record.sequence)
+            if not record.protein_id or not record.sequence or residues: # validate record
+                self.skipped += 1
+                print(f"Skipping '{record.protein_id}': invalid residues {''.join(sorted(residues))}" if residues else f"Skipping '{record.protein_id}': empty sequence")
+                continue
+            sequences[record.protein_id] = record.sequence
 
-                protein, created = Protein.objects.get_or_create( # protein instance with specified assigments 
-                    protein_id=protein_id,
-                    defaults={
-                        "organism": organism,
-                        "length": length_protein,
-                    }
+        existing = Protein.objects.only('protein_id').in_bulk(list(sequences)) # protein_ids already in DB
+        with transaction.atomic():
+            Protein.objects.bulk_create([
+                Protein(protein_id=protein_id, sequence=sequence, length=len(sequence), organism=self.organism, taxa_id=self.organism.taxa_id)
+                for protein_id, sequence in sequences.items() if protein_id not in existing
+            ])
+            with connection.cursor() as cursor: # one prepared UPDATE for all existing proteins
+                now = timezone.now()
+                cursor.executemany(
+                    f"UPDATE {connection.ops.quote_name(Protein._meta.db_table)} SET sequence = %s, length = %s, last_modified = %s WHERE protein_id = %s",
+                    [(sequence, len(sequence), now, protein_id) for protein_id, sequence in sequences.items() if protein_id in existing],
                 )
+            refresh_coverage(sequences) # length changed
 
-                protein.length = length_protein # assigning to received length 
-                protein.organism = organism # assigning to received instance
-                id_custom += 1  # incrementing by 1 
-                protein.id_custom = id_custom  # assigning to custom id
-                protein.save() # saving to DB
+# https://docs.python.org/3/library/exceptions.html
+# loads sequences from a (gzip/bz2 compressed) FASTA file, batch_size records at a time. Records are parsed lazily
+# in this thread so only one batch is in memory.
+def load_fasta_sequences(file_path, batch_size=1000, progress=True):
+    try:
+        path = data_file_path(file_path)
+        loader = FastaSequenceLoader()
+        reporter = ProgressReporter(path, enabled=progress)
+        for batch in iter_fasta_batches(path, batch_size): # stream the FASTA file in batches
+            loader.load_chunk(batch.rows) # write batch to DB
+            reporter.update(batch)
+        if loader.skipped:
+            print(f"{file_path}: skipped {loader.skipped} invalid records.")
+    
+    # error checking
+    except FileNotFoundError: # if file is not found print an error
+        print(f"Error: The '{file_path}' is not found.")
+    
+    except IOError: # if file can not be read print an error
+        print(f"Error: Can not read '{file_path}'.")
+    
+    except Exception as e: # if there is some other error, print the error message
+        print(f"Error: Unexpected error! Check your code and file. {e}")
 
-                instance_of_pfam, _ = Pfam.objects.get_or_create( # pfam instance with specified assigments 
-                    domain_id=domain_id_pfam,
-                    defaults={'domain_description': domain_description},
-                )
+    finally: # also after a failed load, some batches may be committed
+        bump_data_version() # cached API responses are rebuilt from the new data
 
-                domain = Domain.objects.filter(pfam=instance_of_pfam).first() # get domain instance with Pfam instance
+# https://docs.djangoproject.com/en/3.2/topics/db/models/
+# https://docs.djangoproject.com/en/3.2/ref/models/querysets/#get-or-create
+# row-by-row writer stage for "assignment_data_set.csv", every row is saved with its own queries
+class AssignmentRowLoader:
+    def __init__(self, id_custom=80000):
+        self.id_custom = id_custom # custom id to start at 80000 
+
+    # writes one chunk of parsed rows (see parse_assignment_row) in a single transaction, stored coverage of the chunk
+    # is refreshed once at the end instead of after every saved protein and domain assignment
+    def load_chunk(self, records):
+        with transaction.atomic():
+            with coverage_updates_paused():
+                self.save_rows(records)
+            refresh_coverage(record[0] for record in records)
+
+    # saves every row with its own queries
+    def save_rows(self, records):
+        for protein_id, taxa_id, clade, genus, species, domain_description, domain_id_pfam, start, end, length_protein in records: # go through each row 
+            organism, _ = Organism.objects.get_or_create( # organism instance with specified assigments 
+                taxa_id=taxa_id,
+                clade=clade,
+                genus=genus,
+                species=species,
+            )
+
+            protein, created = Protein.objects.get_or_create( # protein instance with specified assigments 
+                protein_id=protein_id,
+                defaults={
+                    "organism": organism,
+                    "length": length_protein,
+                }
+            )
+
+            protein.length = length_protein # assigning to received length 
+            protein.organism = organism # assigning to received instance
+            self.id_custom += 1  # incrementing by 1 
+            protein.id_custom = self.id_custom  # assigning to custom id
+            protein.save() # saving to DB
+
+            instance_of_pfam, _ = Pfam.objects.get_or_create( # pfam instance with specified assigments 
+                domain_id=domain_id_pfam,
+                defaults={'domain_description': domain_description},
+            )
+
+            domain = Domain.objects.filter(pfam=instance_of_pfam).first() # get domain instance with Pfam instance
+
+            if not domain: # if doesnt exist, create with specified assigments 
+                domain = Domain.objects.create(
+                    pfam=instance_of_pfam,
+                    domain_description=domain_description,
+                )
 
-                if not domain: # if doesnt exist, create with specified assigments 
-                    domain = Domain.objects.create(
-                        pfam=instance_of_pfam,
-                        domain_description=domain_description,
-                    )
+            exists = DomainAssignment.objects.filter( # validate if exists 
+                protein=protein,
+                domain=domain,
+                start=start,
+                end=end
+            ).exists()
 
-                exists = DomainAssignment.objects.filter( # validate if exists 
+            if not exists: # if doesnt exist, create with specified assigments 
+                DomainAssignment.objects.create(
                     protein=protein,
                     domain=domain,
                     start=start,
                     end=end
-                ).exists()
+                )
+
+# https://docs.python.org/3/library/exceptions.html
+# loads "assignment_data_set.csv" with loader_class (AssignmentRowLoader or BulkAssignmentLoader) and records a
+# checkpoint after every committed batch. With resume=True an interrupted load of the same file continues from
+# its checkpoint, including the id_custom counter.
+def load_assignment_file(loader_class, file_path, batch_size=5000, progress=True, workers=1, resume=False):
+    try:
+        path = data_file_path(file_path)
+        checkpoint = Checkpoint(path)
+        state = checkpoint.load() if resume else None # saved progress of an interrupted load
+        if state:
+            print(f"Resuming '{file_path}' from byte {state['offset']} (id_custom {state['id_custom']}).")
+            loader = loader_class(id_custom=state['id_custom'])
+        else:
+            loader = loader_class()
+
+        def save_checkpoint(batch): # called after every committed batch
+            checkpoint.save(batch.offset, loader.id_custom)
 
-                if not exists: # if doesnt exist, create with specified assigments 
-                    DomainAssignment.objects.create(
-                        protein=protein,
-                        domain=domain,
-                        start=start,
-                        end=end
-                    )
+        run_pipeline( # stream the "assignment_data_set.csv" in batches
+            path,
+            loader.load_chunk,
+            parse=parse_assignment_row,
+            batch_size=batch_size,
+            progress=progress,
+            workers=workers,
+            start_offset=state['offset'] if state else 0,
+            on_batch=save_checkpoint,
+        )
+        checkpoint.clear() # whole file is loaded
     
     # error checking
     except FileNotFoundError: # if file is not found print an error
@@ -136,26 +238,226 @@ def load_assignment_data_set(file_path):
     except Exception as e: # if there is some other error, print the error message
         print(f"Error: Unexpected error! Check your code and file. {e}")
 
-# https://docs.python.org/3/library/os.path.html
-# https://docs.python.org/3/library/csv.html
-# https://docs.python.org/3/library/functions.html#open
-# https://docs.python.org/3/library/os.path.html#os.path.abspath
-# https://docs.python.org/3/library/os.path.html#os.path.dirname
-# https://docs.python.org/3/library/os.path.html#os.path.join
-# https://docs.djangoproject.com/en/3.2/topics/db/models/
+    finally: # also after a failed load, some batches may be committed
+        bump_data_version() # cached API responses are rebuilt from the new data
+
+def load_assignment_data_set(file_path, batch_size=5000, progress=True, workers=1, resume=False):
+    load_assignment_file(AssignmentRowLoader, file_path, batch_size, progress, workers, resume)
+
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#bulk-create
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#bulk-update
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#in-bulk
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#values-list
+# https://docs.djangoproject.com/en/4.2/topics/db/transactions/#controlling-transactions-explicitly
+# set-based version of load_assignment_data_set: natural keys are resolved against dictionaries kept in memory
+# and every chunk of rows is written with a handful of bulk statements inside one transaction.
+# The database ends up in the same state as with the row-by-row loader.
+class BulkAssignmentLoader:
+    def __init__(self, id_custom=80000):
+        self.id_custom = id_custom # custom id continues from this value (same as row-by-row loader)
+        # (taxa_id, clade, genus, species) -> organism id
+        self.organisms = {
+            (taxa_id, clade, genus, species): organism_id
+            for organism_id, taxa_id, clade, genus, species in Organism.objects.values_list('id', 'taxa_id', 'clade', 'genus', 'species')
+        }
+        self.pfams = set(Pfam.objects.values_list('domain_id', flat=True)) # existing pfam domain_ids
+        self.domains = {} # pfam domain_id -> id of the first domain (same as Domain.objects.filter(pfam=...).first())
+        for domain_id, pfam_id in Domain.objects.filter(pfam__isnull=False).order_by('-id').values_list('id', 'pfam_id'):
+            self.domains[pfam_id] = domain_id # ordered by descending id so the lowest id is kept
+
+    # writes one chunk of parsed rows (see parse_assignment_row) in a single transaction,
+    # id_customs (optional) gives the custom id of every row instead of counting the rows
+    def load_chunk(self, records, id_customs=None):
+        with transaction.atomic():
+            self.create_organisms(records)
+            self.create_pfams_and_domains(records)
+            self.save_proteins(records, id_customs)
+            self.create_domain_assignments(records)
+            refresh_coverage(record[0] for record in records) # bulk statements do not send signals
+
+    # create organisms which are not in the dictionary yet
+    def create_organisms(self, records):
+        new_organisms = {} # keeps order of first appearance 
+        for record in records:
+            key = record[1:5] # (taxa_id, clade, genus, species)
+            if key not in self.organisms and key not in new_organisms:
+                new_organisms[key] = Organism(taxa_id=key[0], clade=key[1], genus=key[2], species=key[3])
+
+        if not new_organisms:
+            return
+        Organism.objects.bulk_create(new_organisms.values(), ignore_conflicts=True) # insert new organisms
+        created = Organism.objects.filter(taxa_id__in={key[0] for key in new_organisms}) # read back ids
+        for organism_id, taxa_id, clade, genus, species in created.values_list('id', 'taxa_id', 'clade', 'genus', 'species'):
+            self.organisms[(taxa_id, clade, genus, species)] = organism_id
+
+    # create pfams and domains which are not in the dictionaries yet, first description in the file wins
+    def create_pfams_and_domains(self, records):
+        new_pfams = {}
+        new_domains = {}
+        for record in records:
+            domain_description, pfam_id = record[5], record[6]
+            if pfam_id not in self.pfams and pfam_id not in new_pfams:
+                new_pfams[pfam_id] = Pfam(domain_id=pfam_id, domain_description=domain_description)
+            if pfam_id not in self.domains and pfam_id not in new_domains:
+                new_domains[pfam_id] = Domain(pfam_id=pfam_id, domain_description=domain_description)
+
+        if new_pfams:
+            Pfam.objects.bulk_create(new_pfams.values(), ignore_conflicts=True) # insert new pfams
+            self.pfams.update(new_pfams)
+        if new_domains:
+            Domain.objects.bulk_create(new_domains.values()) # insert new domains
+            created = Domain.objects.filter(pfam_id__in=list(new_domains)).order_by('-id') # read back ids
+            for domain_id, pfam_id in created.values_list('id', 'pfam_id'):
+                self.domains[pfam_id] = domain_id
+
+    # create new proteins and update existing ones, the last row of each protein decides its values
+    def save_proteins(self, records, id_customs=None):
+        proteins = {}
+        now = timezone.now() # bulk_update does not set auto_now fields
+        for index, record in enumerate(records):
+            if id_customs is None:
+                self.id_custom += 1 # incrementing by 1 for every row (same as row-by-row loader)
+                id_custom = self.id_custom
+            else:
+                id_custom = id_customs[index]
+            proteins[record[0]] = Protein(
+                protein_id=record[0],
+                organism_id=self.organisms[record[1:5]],
+                taxa_id=record[1], # copy of organism taxa_id (Protein.save() is not called by bulk statements)
+                length=record[9],
+                id_custom=id_custom,
+                last_modified=now,
+            )
+        self.protein_taxa = {protein_id: protein.taxa_id for protein_id, protein in proteins.items()} # used for the domain assignments
+
+        existing = Protein.objects.only('protein_id', 'taxa_id').in_bulk(list(proteins)) # proteins already in DB
+        Protein.objects.bulk_create([protein for protein_id, protein in proteins.items() if protein_id not in existing])
+        Protein.objects.bulk_update(
+            [protein for protein_id, protein in proteins.items() if protein_id in existing],
+            ['organism', 'taxa_id', 'length', 'id_custom', 'last_modified'],
+        ) # sequence is not touched so loaded sequences are kept
+
+        moved = defaultdict(list) # new taxa_id -> proteins which moved to another taxa
+        for protein_id, protein in existing.items():
+            if protein.taxa_id != proteins[protein_id].taxa_id:
+                moved[proteins[protein_id].taxa_id].append(protein_id)
+        for taxa_id, protein_ids in moved.items(): # domain assignments loaded before follow their protein
+            DomainAssignment.objects.filter(protein_id__in=protein_ids).update(taxa_id=taxa_id)
+
+    # create domain assignments, existing ones are skipped by the unique (protein, domain, start, end) constraint
+    def create_domain_assignments(self, records):
+        DomainAssignment.objects.bulk_create(
+            [
+                DomainAssignment(protein_id=record[0], domain_id=self.domains[record[6]], start=record[7], end=record[8], taxa_id=self.protein_taxa[record[0]])
+                for record in records
+            ],
+            ignore_conflicts=True,
+        )
+
+# loads "assignment_data_set.csv" with BulkAssignmentLoader, chunk_size rows at a time
+# (with workers > 1 rows are parsed in worker processes and this process writes them)
+def load_assignment_data_set_bulk(file_path, chunk_size=5000, progress=True, workers=1, resume=False):
+    load_assignment_file(BulkAssignmentLoader, file_path, chunk_size, progress, workers, resume)
+
+# https://docs.djangoproject.com/en/4.2/topics/db/aggregation/
+# highest id_custom of protein_ids (0 if none has one), read batch_size proteins per query
+def highest_id_custom(protein_ids, batch_size=5000):
+    protein_ids = list(protein_ids)
+    highest = 0
+    for start in range(0, len(protein_ids), batch_size):
+        batch_highest = Protein.objects.filter(protein_id__in=protein_ids[start:start + batch_size]).aggregate(highest=Max('id_custom'))['highest']
+        highest = max(highest, batch_highest or 0)
+    return highest
+
+# https://docs.python.org/3/library/hashlib.html
+# https://docs.djangoproject.com/en/4.2/topics/db/queries/#deleting-objects
+# delta mode for "assignment_data_set.csv": every protein together with its domain assignments is hashed and compared
+# with the manifest saved by the previous delta load, only inserted, changed and deleted proteins are written.
+# Changed proteins get the same values as with a full reload (their domain assignments are replaced) except id_custom,
+# which counts the rows of the file from the highest id_custom of the unchanged proteins so ids never repeat,
+# unchanged proteins are not touched.
+def load_assignment_data_set_delta(file_path, chunk_size=5000, progress=True):
+    try:
+        path = data_file_path(file_path)
+        manifest = Manifest(path)
+        hashes = compute_record_hashes(path, parse_assignment_row, batch_size=chunk_size) # hash of every protein in the file
+        inserted, updated, deleted = diff_record_hashes(manifest.load(), hashes)
+        changed = set(inserted) | set(updated)
+
+        loader = BulkAssignmentLoader()
+        first_id_custom = max(loader.id_custom, highest_id_custom(set(hashes) - changed, chunk_size)) # after the kept proteins
+        cleared = set() # proteins whose old domain assignments were already removed
+        row_number = 0
+
+        def write_changed(records): # writer stage, skips rows of unchanged proteins
+            nonlocal row_number
+            selected = []
+            id_customs = []
+            for record in records:
+                row_number += 1
+                if record[0] in changed:
+                    selected.append(record)
+                    id_customs.append(first_id_custom + row_number) # same custom id as a full reload
+            if not selected:
+                return
+            with transaction.atomic(), coverage_updates_paused(): # load_chunk refreshes coverage of these proteins
+                proteins = {record[0] for record in selected} - cleared
+                DomainAssignment.objects.filter(protein_id__in=proteins).delete() # replaced by the rows of the new file
+                cleared.update(proteins)
+                loader.load_chunk(selected, id_customs)
+
+        if changed:
+            run_pipeline(path, write_changed, parse=parse_assignment_row, batch_size=chunk_size, progress=progress)
+        for start in range(0, len(deleted), chunk_size): # proteins which are not in the file anymore
+            with transaction.atomic(), coverage_updates_paused(): # stored coverage is deleted with the protein
+                Protein.objects.filter(protein_id__in=deleted[start:start + chunk_size]).delete()
+
+        manifest.save(hashes) # saved only after all changes were applied
+        print(f"{file_path}: {len(inserted)} inserted, {len(updated)} updated, {len(deleted)} deleted, {len(hashes) - len(changed)} unchanged proteins.")
+
+    # error checking
+    except FileNotFoundError: # if file is not found print an error
+        print(f"Error: The '{file_path}' is not found.")
+    
+    except IOError: # if file can not be read print an error
+        print(f"Error: Can not read '{file_path}'.")
+    
+    except Exception as e: # if there is some other error, print the error message
+        print(f"Error: Unexpected error! Check your code and file. {e}")
+
+    finally: # also after a failed load, some batches may be committed
+        bump_data_version() # cached API responses are rebuilt from the new data
+
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#values-list
+# https://docs.djangoproject.com/en/4.2/topics/db/sql/#executing-custom-sql-directly
+# https://docs.python.org/3/library/collections.html#collections.defaultdict
+# writer stage for "pfam_descriptions.csv": pfam domain_id -> [domain ids] is read with one query and the
+# descriptions of a batch are saved with one prepared UPDATE executed for all domains (executemany), which is
+# much faster than building CASE expressions with bulk_update
+class PfamDescriptionLoader:
+    def __init__(self):
+        self.domains = defaultdict(list) # pfam domain_id -> ids of its domains
+        for domain_id, pfam_id in Domain.objects.filter(pfam__isnull=False).values_list('id', 'pfam_id'):
+            self.domains[pfam_id].append(domain_id)
+
+    # saves one batch of (pfam domain_id, description) rows, the last description of a pfam wins
+    def load_chunk(self, rows):
+        descriptions = {domain_id_pfam: description for domain_id_pfam, description in rows} # assign variables into rows 
+        updates = [
+            (description, domain_id) # assigning to received description
+            for domain_id_pfam, description in descriptions.items()
+            for domain_id in self.domains.get(domain_id_pfam, ())
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(f"UPDATE {connection.ops.quote_name(Domain._meta.db_table)} SET domain_description = %s WHERE id = %s", updates) # save to DB
+
 # https://docs.python.org/3/library/exceptions.html
 
-def load_data_pfam_descriptions(file_path):
+def load_data_pfam_descriptions(file_path, batch_size=5000, progress=True):
     try:
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_files', file_path), 'r') as csvfile: # open the "pfam_descriptions.csv"
-            csv_reader = csv.reader(csvfile) # assign variable to create CSV reader
-            for row in csv_reader: # go through each row 
-                domain_id_pfam, description = row # assign variables into rows 
-                domains = Domain.objects.filter(pfam__domain_id=domain_id_pfam)  # filter by domain_id_pfam 
-               
-                for domain in domains: # go through each domain
-                    domain.domain_description = description  # assigning to received description
-                    domain.save() # save to DB
+        loader = PfamDescriptionLoader()
+        run_pipeline(data_file_path(file_path), loader.load_chunk, batch_size=batch_size, progress=progress) # stream the "pfam_descriptions.csv" in batches
     
     # error checking
     except FileNotFoundError: # if file is not found print an error
@@ -167,34 +469,72 @@ def load_data_pfam_descriptions(file_path):
     except Exception as e: # if there is some other error, print the error message
         print(f"Error: Unexpected error! Check your code and file. {e}")
 
-# https://docs.djangoproject.com/en/3.2/topics/db/models/
-# https://docs.djangoproject.com/en/3.2/topics/db/queries/#retrieving-objects
-# https://docs.python.org/3/library/stdtypes.html#set
+    finally: # also after a failed load, some batches may be committed
+        bump_data_version() # cached API responses are rebuilt from the new data
+
+# https://docs.djangoproject.com/en/4.2/ref/models/expressions/#window-functions
+# https://docs.djangoproject.com/en/4.2/ref/models/conditional-expressions/
+# https://docs.djangoproject.com/en/4.2/ref/models/querysets/#update
 # https://docs.djangoproject.com/en/3.2/topics/db/queries/#deleting-objects
 # https://docs.python.org/3/library/exceptions.html
-
-def delete_duplicates():
+# merges organisms with the same (taxa_id, clade, genus, species): the one with the lowest id is kept,
+# proteins of the duplicates are moved to it and the duplicates are deleted. Returns number of merged organisms.
+def delete_duplicates(batch_size=500):
     try:
-        organisms = Organism.objects.all() # getting organisms
-        distinct_organisms = set() # setting distinct set
-        for organism in organisms: # go through all organisms
-            distinct_id = (organism.taxa_id, organism.clade, organism.genus, organism.species) # id for distinct organisms
-            if distinct_id in distinct_organisms: # if id matches distinct organism
-                organism.delete() # delete it
-            else:
-                distinct_organisms.add(distinct_id) # otherwise add it to the set
+        organisms = Organism.objects.annotate( # lowest id of every group of equal organisms
+            survivor_id=Window(Min('id'), partition_by=[F('taxa_id'), F('clade'), F('genus'), F('species')]),
+        )
+        duplicates = dict(organisms.filter(id__gt=F('survivor_id')).values_list('id', 'survivor_id')) # duplicate id -> kept id
+        duplicate_ids = list(duplicates)
+
+        with transaction.atomic():
+            for start in range(0, len(duplicate_ids), batch_size):
+                batch = duplicate_ids[start:start + batch_size]
+                Protein.objects.filter(organism_id__in=batch).update( # move proteins to the kept organism
+                    organism_id=Case(*[When(organism_id=duplicate_id, then=Value(duplicates[duplicate_id])) for duplicate_id in batch]),
+                    last_modified=timezone.now(),
+                )
+                Organism.objects.filter(id__in=batch).delete() # delete duplicates (they have no proteins anymore)
+
+        bump_data_version() # cached API responses are rebuilt from the new data
+        print(f"Merged {len(duplicate_ids)} duplicate organisms.")
+        return len(duplicate_ids)
     
     except TypeError as e:
         raise ValueError("Unable to delete duplicates.") from e
 
-def main():
+# https://docs.python.org/3/library/argparse.html
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Load bioscience data files into the database.")
+    parser.add_argument('--bulk', action='store_true', help="load assignment data set with bulk inserts/updates")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="rows read per batch (one transaction per batch in bulk mode)")
+    parser.add_argument('--workers', type=int, default=1, help="processes used to parse the assignment data set")
+    parser.add_argument('--fasta', help="load sequences from this FASTA file (.fasta, .fasta.gz or .fasta.bz2) instead of assignment_data_sequences.csv")
+    parser.add_argument('--delta', action='store_true', help="apply only proteins which changed since the last delta load")
+    parser.add_argument('--resume', action='store_true', help="continue an interrupted load of the assignment data set from its checkpoint")
+    parser.add_argument('--quiet', action='store_true', help="do not print progress")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    arguments = parse_arguments(argv) # read command line options
     assignment_data_sequences = 'assignment_data_sequences.csv' # assigning variable to the file
     assignment_data_set = 'assignment_data_set.csv' # assigning variable to the file
     pfam_descriptions = 'pfam_descriptions.csv' # assigning variable to the file
     
-    load_assignment_data_sequences(assignment_data_sequences) # load specified file
-    load_assignment_data_set(assignment_data_set) # load specified file
-    load_data_pfam_descriptions(pfam_descriptions) # load specified file
+    batch_size = arguments.chunk_size # rows per batch
+    progress = not arguments.quiet # print progress for every batch
+    
+    if arguments.fasta:
+        load_fasta_sequences(arguments.fasta, batch_size, progress) # load sequences from FASTA file
+    else:
+        load_assignment_data_sequences(assignment_data_sequences, batch_size, progress) # load specified file
+    if arguments.delta:
+        load_assignment_data_set_delta(assignment_data_set, batch_size, progress) # load only changes of specified file
+    elif arguments.bulk:
+        load_assignment_data_set_bulk(assignment_data_set, batch_size, progress, arguments.workers, arguments.resume) # load specified file in bulk mode
+    else:
+        load_assignment_data_set(assignment_data_set, batch_size, progress, arguments.workers, arguments.resume) # load specified file
+    load_data_pfam_descriptions(pfam_descriptions, batch_size, progress) # load specified file
 
 if __name__ == '__main__':
     delete_duplicates() # delete duplicates from DB